@@ -0,0 +1,125 @@
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import game_record
+from gameplay import gamePlay
+
+INF = float('inf')
+
+# one game per board size in each worker process, so its tables are built once.
+# it has no transposition table and its move ordering is cleared for every
+# record, so a record's analysis never depends on what the worker did before
+_worker_games = {}
+
+
+def _worker_game(width, height):
+    game = _worker_games.get((width, height))
+    if game is None:
+        game = gamePlay(width, height, tt_size=0)
+        _worker_games[(width, height)] = game
+    else:
+        game.clear_ordering()
+    return game
+
+
+def analyze_record(record, depth, blunder):
+    # re-scores every move of one game. evals are from black's side (player 1
+    # maximizes, as in tournament.py); loss is how much worse the played move is
+    # than the engine's choice for the player who made it, and a move that loses
+    # at least `blunder` is flagged
+    game = _worker_game(record["width"], record["height"])
+    rows = []
+    previous = None
+    for ply, (state, move, player, ms, _) in enumerate(game_record.positions(record)):
+        maximizing = player == game.AI
+        game.load_snapshot(state)
+        game.nodes = 0
+        best, best_move = game.alphabeta(depth, -INF, INF, maximizing)
+        if tuple(move) == best_move:
+            played = best
+        else:
+            game.makeMove(move, player)
+            if game.checkWinner() == player:
+                played = game.evaluate()
+            else:
+                played, _ = game.alphabeta(depth - 1, -INF, INF, not maximizing)
+        loss = best - played if maximizing else played - best
+        rows.append({
+            "ply": ply,
+            "player": player,
+            "move": list(move),
+            "ms": ms,
+            "best_move": list(best_move) if best_move else None,
+            "best": best,
+            "eval": played,
+            "swing": None if previous is None else played - previous,
+            "loss": max(loss, 0),
+            "blunder": loss >= blunder,
+            "nodes": game.nodes,
+        })
+        previous = played
+    return rows
+
+
+def analyze(records, depth=2, blunder=10 ** 5, workers=None):
+    # yields (record, rows) in input order. at most 2 * workers games are read
+    # ahead of the one being yielded, so memory stays flat however long the input is
+    workers = workers or os.cpu_count() or 1
+    executor = ProcessPoolExecutor(max_workers=workers)
+    limit = 2 * workers
+    pending = deque()
+    try:
+        for record in records:
+            pending.append((record, executor.submit(analyze_record, record, depth, blunder)))
+            if len(pending) >= limit:
+                record, future = pending.popleft()
+                yield record, future.result()
+        while pending:
+            record, future = pending.popleft()
+            yield record, future.result()
+    finally:
+        for _, future in pending:
+            future.cancel()
+        executor.shutdown()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-score recorded games and flag blunders")
+    parser.add_argument("paths", nargs="*", default=[game_record.DEFAULT_PATH],
+                        help="game record files (.jsonl or .jsonl.gz, - for stdin)")
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--blunder", type=int, default=10 ** 5,
+                        help="eval loss that flags a move as a blunder")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", default="-", help="per-move JSON lines, - for stdout")
+    args = parser.parse_args(argv)
+
+    def records():
+        for path in args.paths:
+            yield from game_record.read_records(path)
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w")
+    start = time.perf_counter()
+    games = moves = blunders = 0
+    try:
+        for index, (record, rows) in enumerate(analyze(records(), args.depth, args.blunder, args.workers)):
+            games += 1
+            for row in rows:
+                moves += 1
+                blunders += row["blunder"]
+                out.write(json.dumps(dict(row, game=index), separators=(",", ":")) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"{games} games, {moves} moves, {blunders} blunders in "
+          f"{time.perf_counter() - start:.1f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+from benchmarks.positions import CORPUS, build_position
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+# peaks and blocks per node measured on the tree before the search core was
+# unified (minimax and alphabeta with their own move lists and copies), to
+# compare against
+DEFAULT_BASELINE = os.path.join(HERE, "allocations_baseline.json")
+
+
+def run_search(game, algorithm, depth):
+    if algorithm == "minimax":
+        return game.minimax(depth, True)
+    if algorithm == "pvs":
+        return game.pvs(depth, -float('inf'), float('inf'), True)
+    return game.alphabeta(depth, -float('inf'), float('inf'), True)
+
+
+def count_blocks(func):
+    # small object blocks allocated while func runs. the live block count is read
+    # on every call and return (python and builtin), and the rises between readings
+    # are added up; each reading keeps its own int alive, hence the -1. blocks
+    # allocated and freed between two calls are missed, so this is a lower bound
+    samples = []
+    read = sys.getallocatedblocks
+
+    def hook(frame, event, arg):
+        samples.append(read())
+
+    sys.setprofile(hook)
+    try:
+        func()
+    finally:
+        sys.setprofile(None)
+    return sum(b - a - 1 for a, b in zip(samples, samples[1:]) if b - a > 1)
+
+
+def measure(name, algorithm, depth):
+    # peak memory traced during the search, beyond what the position already held,
+    # and the slowdown tracemalloc causes, which grows with every block allocated.
+    # the untraced run on the same game warms the shared pattern caches and any
+    # buffers grown on first use, so only what each search allocates is counted.
+    # the peak only shows what is alive at once; blocks per node counts the churn
+    size, moves = CORPUS[name]
+    game = build_position(size, moves, tt_size=0)
+    start = time.perf_counter()
+    run_search(game, algorithm, depth)
+    plain = time.perf_counter() - start
+
+    game.clear_ordering()
+    game.nodes = 0
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    run_search(game, algorithm, depth)
+    traced = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    game.clear_ordering()
+    game.nodes = 0
+    blocks = count_blocks(lambda: run_search(game, algorithm, depth))
+    return {
+        "nodes": game.nodes,
+        "blocks": blocks,
+        "blocks_per_node": blocks / game.nodes if game.nodes else 0.0,
+        "peak_bytes": peak - before,
+        "peak_bytes_per_ply": (peak - before) / depth,
+        "tracemalloc_overhead": traced / plain if plain > 0 else 0.0,
+    }
+
+
+def key(name, algorithm, depth):
+    return f"{name} {algorithm}-{depth}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory allocated by the search, measured with tracemalloc")
+    parser.add_argument("--positions", nargs="+", choices=sorted(CORPUS),
+                        default=["opening-15", "midgame-15", "midgame-19"])
+    parser.add_argument("--algorithms", nargs="+", choices=["alphabeta", "pvs", "minimax"],
+                        default=["alphabeta", "pvs", "minimax"])
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="write these results as the new baseline")
+    args = parser.parse_args()
+
+    baseline = {}
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+    results = {}
+    for name in args.positions:
+        for algorithm in args.algorithms:
+            depth = min(args.depth, 2) if algorithm == "minimax" else args.depth
+            result = measure(name, algorithm, depth)
+            results[key(name, algorithm, depth)] = result
+            line = (f"{key(name, algorithm, depth)}: {result['nodes']} nodes, "
+                    f"{result['blocks_per_node']:.1f} blocks/node, "
+                    f"peak {result['peak_bytes'] / 1024:.1f} KiB "
+                    f"({result['peak_bytes_per_ply'] / 1024:.1f} KiB/ply), "
+                    f"tracemalloc overhead {result['tracemalloc_overhead']:.2f}x")
+            old = baseline.get(key(name, algorithm, depth))
+            if old is not None:
+                if "blocks_per_node" in old:
+                    line += (f"; baseline {old['blocks_per_node']:.1f} blocks/node "
+                             f"({(result['blocks_per_node'] / old['blocks_per_node'] - 1) * 100:+.0f}%)")
+                line += (f"; baseline peak {old['peak_bytes'] / 1024:.1f} KiB "
+                         f"({(result['peak_bytes'] - old['peak_bytes']) / 1024:+.1f} KiB), "
+                         f"overhead {old['tracemalloc_overhead']:.2f}x")
+                if old["nodes"] != result["nodes"]:
+                    line += f", {old['nodes']} nodes"
+            print(line)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({"python": sys.version.split()[0], "results": results}, f, indent=2)
+        print(f"Baseline saved to {args.baseline}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import argparse
+import os
+import time
+
+from benchmarks.positions import build_position, random_moves
+from parallel_search import ParallelSearch
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel root search speedup versus worker count")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[15, 19])
+    parser.add_argument("--plies", type=int, default=12)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, 4, 8, os.cpu_count() or 1}))
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    # root splitting searches more nodes than serial alphabeta (later root moves
+    # only get the bound of the waves before them), so the node ratio is the most
+    # the extra cores have to win back
+    print(f"{os.cpu_count()} cpus")
+    for size in args.sizes:
+        moves = random_moves(size, args.plies, args.seed)
+        game = build_position(size, moves, tt_size=0)
+        start = time.perf_counter()
+        serial_score, serial_move = game.alphabeta(args.depth, -float('inf'), float('inf'), True)
+        serial_time = time.perf_counter() - start
+        serial_nodes = game.nodes
+        print(f"{size}x{size} depth {args.depth}: serial {serial_time:.2f}s "
+              f"nodes {serial_nodes} move {serial_move} score {serial_score}")
+        for workers in args.workers:
+            game = build_position(size, moves, tt_size=0)
+            with ParallelSearch(workers) as parallel:
+                start = time.perf_counter()
+                score, move = parallel.search(game, args.depth)
+                elapsed = time.perf_counter() - start
+            same = "same" if (score, move) == (serial_score, serial_move) else "DIFFERENT"
+            print(f"  {workers:2} workers: {elapsed:.2f}s speedup {serial_time / elapsed:.2f}x "
+                  f"nodes {parallel.nodes} ({parallel.nodes / serial_nodes:.1f}x serial, {same} result)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import random
+
+from gameplay import gamePlay
+
+
+def build_position(size, moves, **kwargs):
+    # moves alternate AI, HUMAN starting with the AI, like a real game
+    game = gamePlay(size, size, **kwargs)
+    player = game.AI
+    for move in moves:
+        game.makeMove(tuple(move), player)
+        player = 3 - player
+    game.curr_player = player
+    return game
+
+
+def random_moves(size, plies, seed):
+    # plausible, win-free play: each side picks among the engine's top candidates
+    rng = random.Random(seed)
+    game = gamePlay(size, size, tt_size=0)
+    centre = (size // 2, size // 2)
+    moves = [centre]
+    game.makeMove(centre, game.AI)
+    player = game.HUMAN
+    while len(moves) < plies:
+        options = [move for move in game.generateMoves()[:6]
+                   if not game.is_winning_move(move, player)]
+        if not options:
+            break
+        move = rng.choice(options)
+        game.makeMove(move, player)
+        moves.append(move)
+        player = 3 - player
+    return moves
+
+
+# fixed corpus for the benchmark suite; moves alternate AI, HUMAN from the first
+CORPUS = {
+    "opening-5": (5, [(2, 2), (1, 1)]),
+    "midgame-5": (5, [(2, 2), (2, 1), (3, 0), (1, 2), (4, 1), (0, 1), (1, 1), (3, 1)]),
+    "tactical-5": (5, [(2, 0), (0, 0), (2, 1), (0, 1), (2, 2), (0, 2), (2, 3), (4, 4)]),
+    "opening-15": (15, [(7, 7), (8, 8), (9, 9), (10, 10)]),
+    "midgame-15": (15, [(7, 7), (8, 7), (7, 6), (6, 8), (7, 5), (7, 8), (5, 8), (9, 8),
+                        (10, 9), (6, 5), (5, 4), (4, 3), (7, 4), (7, 9), (5, 7), (5, 5)]),
+    "tactical-15": (15, [(7, 5), (6, 6), (7, 6), (6, 7), (7, 7), (6, 8), (8, 6), (9, 9)]),
+    "opening-19": (19, [(9, 9), (8, 8), (10, 8), (11, 7)]),
+    "midgame-19": (19, [(9, 9), (10, 10), (10, 11), (8, 10), (11, 10), (8, 9), (8, 8), (8, 11),
+                        (7, 7), (8, 12), (6, 6), (11, 11), (8, 13), (12, 9), (8, 14), (9, 12),
+                        (9, 11), (8, 7), (8, 15), (12, 12), (8, 6), (11, 12), (13, 13), (5, 5)]),
+    "tactical-19": (19, [(9, 9), (8, 8), (9, 10), (8, 12), (10, 11), (12, 8), (11, 11),
+                         (7, 13), (12, 11), (3, 3)]),
+}
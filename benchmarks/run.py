@@ -0,0 +1,226 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy_eval
+from benchmarks.positions import CORPUS, build_position
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(HERE, "baseline.json")
+
+
+def best_of(repeats, func):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_evaluate(game, repeats):
+    def run():
+        for _ in range(100):
+            game.evaluate()
+    return best_of(repeats, run) * 1000 / 100
+
+
+def bench_evaluate_full(game, repeats):
+    return best_of(repeats, game.evaluate_full) * 1000
+
+
+def bench_numpy(size, moves, repeats):
+    game = build_position(size, moves, evaluator="numpy")
+    children = game.generateMoves()
+    return {
+        "numpy_evaluate_ms": best_of(repeats, game.evaluate) * 1000,
+        "numpy_children_ms": best_of(
+            repeats, lambda: game.numpy_eval.evaluate_children(children, game.AI)) * 1000,
+    }
+
+
+def bench_bitboard(size, moves, repeats):
+    # the same scans with backend="bitboard": shift-and-AND run counts and five tests
+    game = build_position(size, moves, backend="bitboard")
+    return {
+        "bitboard_evaluate_full_ms": bench_evaluate_full(game, repeats),
+        "bitboard_is_winning_move_ms": bench_is_winning_move(game, repeats),
+    }
+
+
+def bench_generate_moves(game, repeats):
+    return best_of(repeats, game.generateMoves) * 1000
+
+
+def bench_is_winning_move(game, repeats):
+    empty = [(x, y) for x in range(game.height) for y in range(game.width) if game.board[x][y] == 0]
+
+    def run():
+        for move in empty:
+            game.is_winning_move(move, game.AI)
+            game.is_winning_move(move, game.HUMAN)
+    return best_of(repeats, run) * 1000 / (2 * len(empty))
+
+
+def bench_search(size, moves, algorithm, depth, repeats):
+    # fresh game (and transposition table) for every run so each depth is measured
+    # cold; the fastest run counts, node counts are the same every time
+    elapsed = float('inf')
+    for _ in range(repeats):
+        game = build_position(size, moves)
+        game.nodes = 0
+        start = time.perf_counter()
+        if algorithm == "alphabeta":
+            _, move = game.alphabeta(depth, -float('inf'), float('inf'), True)
+        elif algorithm == "pvs":
+            _, move = game.pvs(depth, -float('inf'), float('inf'), True)
+        elif algorithm == "search":
+            # iterative deepening with aspiration windows, as Console and the GUI run it
+            game.threat_budget = 0
+            _, move = game.search(max_depth=depth)
+        else:
+            _, move = game.minimax(depth, True)
+        elapsed = min(elapsed, time.perf_counter() - start)
+    return {
+        "ms_per_move": elapsed * 1000,
+        "nodes": game.nodes,
+        "nodes_per_sec": game.nodes / elapsed if elapsed > 0 else 0.0,
+        "move": list(move) if move else None,
+    }
+
+
+def run_suite(names, algorithms, max_depths, repeats, search_repeats):
+    results = {}
+    for name in names:
+        size, moves = CORPUS[name]
+        game = build_position(size, moves)
+        entry = {
+            "evaluate_ms": bench_evaluate(game, repeats),
+            "evaluate_full_ms": bench_evaluate_full(game, repeats),
+            "generateMoves_ms": bench_generate_moves(game, repeats),
+            "is_winning_move_ms": bench_is_winning_move(game, repeats),
+        }
+        entry.update(bench_bitboard(size, moves, repeats))
+        if numpy_eval.available():
+            entry.update(bench_numpy(size, moves, repeats))
+        for algorithm in algorithms:
+            for depth in range(1, max_depths[algorithm] + 1):
+                entry[f"{algorithm}-{depth}"] = bench_search(size, moves, algorithm, depth, search_repeats)
+        results[name] = entry
+        print(f"{name}: " + ", ".join(
+            f"{key} {value:.3f}ms" if isinstance(value, float) else
+            f"{key} {value['ms_per_move']:.0f}ms/{value['nodes']}n"
+            for key, value in entry.items()
+        ), file=sys.stderr)
+    return results
+
+
+def flatten(results):
+    # (position, metric) -> milliseconds, plus search node counts
+    flat = {}
+    for name, entry in results.items():
+        for key, value in entry.items():
+            if isinstance(value, dict):
+                flat[(name, key, "ms")] = value["ms_per_move"]
+                flat[(name, key, "nodes")] = value["nodes"]
+            else:
+                flat[(name, key, "ms")] = value
+    return flat
+
+
+def node_savings(results, depth):
+    # node counts of pvs and iterative deepening search at `depth` against plain
+    # alphabeta, per position and over the whole corpus
+    lines = []
+    totals = {"alphabeta": 0, "pvs": 0, "search": 0}
+    for name, entry in results.items():
+        base = entry.get(f"alphabeta-{depth}")
+        if not base or not base["nodes"]:
+            continue
+        for algorithm in ("pvs", "search"):
+            row = entry.get(f"{algorithm}-{depth}")
+            if row:
+                lines.append(f"{name} {algorithm}-{depth}: {row['nodes']} nodes vs alphabeta "
+                             f"{base['nodes']} ({(row['nodes'] / base['nodes'] - 1) * 100:+.0f}%)")
+                totals[algorithm] += row["nodes"]
+        totals["alphabeta"] += base["nodes"]
+    for algorithm in ("pvs", "search"):
+        if totals[algorithm] and totals["alphabeta"]:
+            lines.append(f"total {algorithm}-{depth}: {totals[algorithm]} nodes vs alphabeta "
+                         f"{totals['alphabeta']} ({(totals[algorithm] / totals['alphabeta'] - 1) * 100:+.0f}%)")
+    return lines
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    current = flatten(results)
+    previous = flatten(baseline["results"])
+    for key, value in sorted(current.items()):
+        if key not in previous:
+            continue
+        old = previous[key]
+        name, metric, unit = key
+        if unit == "nodes":
+            if value > old:
+                regressions.append(f"{name} {metric}: nodes {old} -> {value}")
+        elif old > 0 and value > old * (1 + tolerance) and value - old > 0.05:
+            regressions.append(f"{name} {metric}: {old:.3f}ms -> {value:.3f}ms "
+                               f"(+{(value / old - 1) * 100:.0f}%)")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the evaluation and search hot paths")
+    parser.add_argument("--positions", nargs="+", choices=sorted(CORPUS), default=list(CORPUS))
+    parser.add_argument("--algorithms", nargs="+", choices=["alphabeta", "pvs", "search", "minimax"],
+                        default=["alphabeta", "pvs", "search", "minimax"])
+    parser.add_argument("--alphabeta-depth", type=int, default=4,
+                        help="also the depth for pvs and search")
+    parser.add_argument("--minimax-depth", type=int, default=2,
+                        help="minimax is full width, deeper than 2 takes minutes on 19x19")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--search-repeats", type=int, default=3,
+                        help="runs of each search, the fastest is kept")
+    parser.add_argument("--output", default=os.path.join(HERE, "results.json"))
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="write these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown before a timing counts as a regression")
+    args = parser.parse_args(argv)
+
+    max_depths = {"alphabeta": args.alphabeta_depth, "pvs": args.alphabeta_depth,
+                  "search": args.alphabeta_depth, "minimax": args.minimax_depth}
+    results = run_suite(args.positions, args.algorithms, max_depths, args.repeats, args.search_repeats)
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    for line in node_savings(results, args.alphabeta_depth):
+        print(line, file=sys.stderr)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.baseline}", file=sys.stderr)
+        return 0
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare against, run with --save-baseline", file=sys.stderr)
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+    for line in regressions:
+        print(f"REGRESSION {line}", file=sys.stderr)
+    if not regressions:
+        print("No regressions against baseline", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
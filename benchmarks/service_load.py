@@ -0,0 +1,116 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from engine_service import EngineService, percentiles
+
+
+class Client:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.next_id = 0
+
+    async def request(self, **request):
+        # one request at a time per connection, so the reply is the next line
+        self.next_id += 1
+        request["id"] = self.next_id
+        self.writer.write((json.dumps(request) + "\n").encode())
+        await self.writer.drain()
+        reply = json.loads(await self.reader.readline())
+        if "error" in reply:
+            raise RuntimeError(reply["error"])
+        return reply
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+def opponent_move(rng, size, stones):
+    # a random empty cell next to a stone, or the centre on an empty board
+    if not stones:
+        return size // 2, size // 2
+    cells = sorted({(x + dx, y + dy) for x, y in stones for dx in (-1, 0, 1) for dy in (-1, 0, 1)
+                    if 0 <= x + dx < size and 0 <= y + dy < size} - stones)
+    return rng.choice(cells) if cells else None
+
+
+async def play(connect, game_id, size, moves, budget_ms, seed, latencies):
+    # the engine against a random neighbour-of-a-stone opponent, over its own connection
+    client = Client(*await connect())
+    rng = random.Random(seed)
+    stones = set()
+    played = 0
+    await client.request(op="new", game=game_id, size=size, budget_ms=budget_ms)
+    # the engine opens every other game
+    move = None if seed % 2 else opponent_move(rng, size, stones)
+    if move is not None:
+        stones.add(move)
+    while played < moves:
+        start = time.perf_counter()
+        reply = await client.request(op="move", game=game_id, move=move)
+        latencies.append((time.perf_counter() - start) * 1000)
+        played += 1
+        if reply["move"] is None or reply["winner"]:
+            break
+        stones.add(tuple(reply["move"]))
+        move = opponent_move(rng, size, stones)
+        if move is None:
+            break
+        stones.add(move)
+    await client.request(op="end", game=game_id)
+    await client.close()
+    return played
+
+
+async def run(args):
+    service = None
+    if args.connect:
+        host, _, port = args.connect.rpartition(":")
+        connect = lambda: asyncio.open_connection(host or "127.0.0.1", int(port))
+    else:
+        service = EngineService(args.workers, max_depth=args.max_depth)
+        server = await service.start(port=0)
+        port = server.sockets[0].getsockname()[1]
+        connect = lambda: asyncio.open_connection("127.0.0.1", port)
+    latencies = []
+    try:
+        start = time.perf_counter()
+        played = await asyncio.gather(*(
+            play(connect, f"load-{i}", args.size, args.moves, args.budget, args.seed + i, latencies)
+            for i in range(args.games)
+        ))
+        elapsed = time.perf_counter() - start
+        client = Client(*await connect())
+        stats = await client.request(op="stats")
+        await client.close()
+    finally:
+        if service is not None:
+            await service.stop()
+    total = sum(played)
+    print(f"{args.games} games, {total} engine moves in {elapsed:.1f}s "
+          f"({total / elapsed:.1f} moves/s)")
+    print(f"client latency ms: {percentiles(latencies)}")
+    print(f"service: {json.dumps(stats)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play many concurrent games against the engine service")
+    parser.add_argument("--connect", default=None,
+                        help="host:port of a running service; by default one is started in-process")
+    parser.add_argument("--games", type=int, default=16)
+    parser.add_argument("--moves", type=int, default=10, help="engine moves per game at most")
+    parser.add_argument("--size", type=int, default=15)
+    parser.add_argument("--budget", type=int, default=200, help="per-move search budget in ms")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--max-depth", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
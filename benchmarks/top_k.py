@@ -0,0 +1,69 @@
+import argparse
+import heapq
+import random
+import time
+
+from benchmarks.positions import CORPUS, build_position
+from gameplay import gamePlay
+
+
+def random_position(size, stones, seed):
+    # scattered stones, for frontiers far larger than the beam
+    rng = random.Random(seed)
+    game = gamePlay(size, size)
+    cells = [(x, y) for x in range(size) for y in range(size)]
+    rng.shuffle(cells)
+    for i, (x, y) in enumerate(cells[:stones]):
+        game.setCell(x, y, 1 + i % 2)
+    return game
+
+
+def selections(game):
+    # generateMoves' selection step both ways: a full stable sort cut to the beam,
+    # and heapq.nlargest, which keeps ties in the same order
+    key = game.candidate_key
+    k = game.beam_width
+
+    def full_sort():
+        moves = list(game.frontier)
+        game.score_candidates(moves, game.candidate_scores)
+        moves.sort(key=key, reverse=True)
+        del moves[k:]
+        return moves
+
+    def nlargest():
+        moves = list(game.frontier)
+        game.score_candidates(moves, game.candidate_scores)
+        return heapq.nlargest(k, moves, key=key)
+
+    return full_sort, nlargest
+
+
+def best_of(repeats, calls, func):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(calls):
+            func()
+        best = min(best, time.perf_counter() - start)
+    return best / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Full sort versus heapq.nlargest for the move beam")
+    parser.add_argument("--calls", type=int, default=1000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    games = [(name, build_position(size, moves)) for name, (size, moves) in CORPUS.items()]
+    games += [(f"random-19-{stones}", random_position(19, stones, stones)) for stones in (30, 60, 100)]
+    for name, game in games:
+        full_sort, nlargest = selections(game)
+        assert full_sort() == nlargest()
+        print(f"{name}: frontier {len(game.frontier)}, "
+              f"sort {best_of(args.repeats, args.calls, full_sort):.1f}us, "
+              f"nlargest {best_of(args.repeats, args.calls, nlargest):.1f}us")
+
+
+if __name__ == "__main__":
+    main()
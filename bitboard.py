@@ -0,0 +1,93 @@
+def _popcount(bits):
+    return bin(bits).count("1")
+
+
+popcount = getattr(int, "bit_count", _popcount)
+
+
+class BitBoard:
+    # one python int per player, bit (x * stride + y) set when the stone is there.
+    # stride is width + 1 so the spare guard column stops horizontal and diagonal
+    # shifts from wrapping onto the next row. gamePlay keeps it next to its list
+    # board for five detection and whole-board run counts
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.stride = width + 1
+        self.stones = [0, 0, 0]
+        self.dirs = [(1, 0), (1, 1), (1, -1), (0, 1)]
+        self.shifts = [dx * self.stride + dy for dx, dy in self.dirs]
+        self.full = 0
+        for x in range(height):
+            self.full |= ((1 << width) - 1) << (x * self.stride)
+        self.windows = [self._window(i) for i in range(height * self.stride)]
+
+    def _window(self, index):
+        # masks of the cells within 4 steps of `index` along each direction
+        x, y = divmod(index, self.stride)
+        if y >= self.width:
+            return None
+        masks = []
+        for dx, dy in self.dirs:
+            mask = 0
+            for i in range(-4, 5):
+                nx, ny = x + dx * i, y + dy * i
+                if 0 <= nx < self.height and 0 <= ny < self.width:
+                    mask |= 1 << (nx * self.stride + ny)
+            masks.append(mask)
+        return masks
+
+    def get(self, x, y):
+        bit = 1 << (x * self.stride + y)
+        if self.stones[1] & bit:
+            return 1
+        if self.stones[2] & bit:
+            return 2
+        return 0
+
+    def set(self, x, y, value):
+        bit = 1 << (x * self.stride + y)
+        self.stones[1] &= ~bit
+        self.stones[2] &= ~bit
+        if value:
+            self.stones[value] |= bit
+
+    def makes_five(self, x, y, player):
+        index = x * self.stride + y
+        own = self.stones[player] | (1 << index)
+        for s, window in zip(self.shifts, self.windows[index]):
+            line = own & window
+            run = line & (line >> s)
+            run &= run >> (2 * s)
+            if run & (line >> (4 * s)):
+                return True
+        return False
+
+    def run_counts(self, player):
+        # {(length, open ends): runs} for the player's runs of 1 to 4 stones in all
+        # four directions, as evaluate_full counts them. a run starts on a stone
+        # with no own stone before it; the guard column, and the bits shifted in
+        # past either end of the board, are neither own nor empty so they block
+        own = self.stones[player]
+        empty = self.full & ~(self.stones[1] | self.stones[2])
+        counts = dict.fromkeys([(length, ends) for length in range(1, 5) for ends in range(3)], 0)
+        for s in self.shifts:
+            runs = own & ~(own << s)
+            open_before = empty << s
+            for length in range(1, 5):
+                beyond = own >> (length * s)
+                exact = runs & ~beyond
+                if exact:
+                    open_after = empty >> (length * s)
+                    both = popcount(exact & open_before & open_after)
+                    either = popcount(exact & (open_before | open_after))
+                    counts[(length, 2)] += both
+                    counts[(length, 1)] += either - both
+                    counts[(length, 0)] += popcount(exact) - either
+                runs &= beyond
+                if not runs:
+                    break
+        return counts
+
+    def score(self, player, weights):
+        return sum(weights.get(key, 0) * count for key, count in self.run_counts(player).items() if count)
@@ -1,18 +1,54 @@
+import time
+
+import game_record
+import opening_book
+from ponder import Ponderer
+
+
 class Console:
-    def __init__(self, game, game_mode, ai1_algo=None, ai2_algo=None):
+    def __init__(self, game, game_mode, ai1_algo=None, ai2_algo=None, show_stats=False, ponder=True,
+                 record=True):
         self.game = game
         self.game_mode = game_mode
         self.ai1_algo = ai1_algo or "alphabeta"
         self.ai2_algo = ai2_algo or "minimax"
         self.ai1 = game.AI
         self.ai2 = game.HUMAN
+        self.time_budget_ms = 5000
+        self.stats = game.enable_stats() if show_stats else None
+        if game.book is None:
+            game.book = opening_book.load_default(game.width, game.height)
+        # search the human's likely replies while they think
+        self.ponderer = Ponderer(game) if ponder and game_mode == "human_vs_ai" else None
+        self.recorder = None
+        if record:
+            if game_mode == "ai_vs_ai":
+                black = game_record.side(self.ai1_algo, 2)
+                white = game_record.side(self.ai2_algo, 2)
+            elif game_mode == "human_vs_ai":
+                black, white = game_record.side(self.ai1_algo, 3), game_record.side("human")
+            else:
+                black, white = game_record.side("human"), game_record.side("human")
+            self.recorder = game_record.GameRecorder(game.width, game.height, game_mode, black, white)
     def run(self):
-        if self.game_mode == "ai_vs_ai":
-            self._run_ai_vs_ai()
-        elif self.game_mode == "human_vs_human":
-            self._run_human_vs_human()
+        try:
+            if self.game_mode == "ai_vs_ai":
+                self._run_ai_vs_ai()
+            elif self.game_mode == "human_vs_human":
+                self._run_human_vs_human()
+            else:
+                self._run_human_vs_ai()
+        finally:
+            self._save_record()
+
+    def _save_record(self):
+        if self.recorder is None:
+            return
+        winner = self.game.checkWinner()
+        if winner:
+            self.recorder.finish(winner, "win")
         else:
-            self._run_human_vs_ai()
+            self.recorder.finish(0, "draw" if self.check_tie() else "abandoned")
     def _run_human_vs_human(self):
         print("Gomoku - Human vs Human")
         while True:
@@ -45,12 +81,7 @@ class Console:
                 self._ai_turn()
 
     def check_tie(self):
-        for i in range(self.game.width*self.game.height):
-            tempi = i//self.game.height
-            tempj = i%self.game.height
-            if self.game.board[tempi][tempj] == 0:
-                return False
-        return True
+        return self.game.stone_count == self.game.width * self.game.height
     def _run_ai_vs_ai(self):
         print(f"Gomoku - AI ({self.ai1_algo.title()}) vs AI ({self.ai2_algo.title()})\n")
         print(f"Board size: {self.game.width}x{self.game.height}")
@@ -71,15 +102,21 @@ class Console:
                 ai_name = f"AI 2 ({algo.title()})"
 
             print(f"{ai_name} is thinking...")
+            self._reset_stats()
+            start = time.perf_counter()
             if algo == "alphabeta":
-                _, move = self.game.alphabeta(2, -float('inf'), float('inf'), True)
+                score, move = self.game.search(time_budget_ms=self.time_budget_ms, max_depth=2)
+                source = self.game.search_source
             else:
-                _, move = self.game.minimax(2, True)
+                score, move = self.game.minimax(2, True)
+                source = "minimax"
 
+            self._record(move, self.game.curr_player, start, score, source)
             self._make_ai_move(move, self.game.curr_player, ai_name)
 
     def _human_turn(self):
         max_index = self.game.width - 1
+        start = time.perf_counter()
         while True:
             try:
                 prompt = f"Enter your move (row,col 0-{max_index}): "
@@ -96,10 +133,9 @@ class Console:
                     print("Position already occupied! Try again.")
                     continue
 
-                if self.game_mode == "human_vs_ai":
-                    self.game.makeMove((row, col), self.game.HUMAN)
-                else:
-                    self.game.makeMove((row, col), self.game.curr_player)
+                player = self.game.HUMAN if self.game_mode == "human_vs_ai" else self.game.curr_player
+                self._record((row, col), player, start)
+                self.game.makeMove((row, col), player)
                 break
 
             except (ValueError, IndexError):
@@ -110,20 +146,49 @@ class Console:
 
     def _ai_turn(self):
         print("\nAI is thinking...")
-        _, best_move = self.game.alphabeta(3, -float('inf'), float('inf'), True)
+        self._reset_stats()
+        start = time.perf_counter()
+        found = None
+        if self.ponderer is not None:
+            found = self.ponderer.take(self.game.snapshot(), 3, timeout=self.time_budget_ms / 1000)
+        if found is not None:
+            score, best_move = found
+            source = "ponder"
+        else:
+            score, best_move = self.game.search(time_budget_ms=self.time_budget_ms, max_depth=3)
+            source = self.game.search_source
         if best_move:
+            self._record(best_move, self.game.AI, start, score, source)
             self.game.makeMove(best_move, self.game.AI)
-            print(f"AI plays at {best_move}\n")
+            print(f"AI plays at {best_move}" + (" (pondered)" if found is not None else ""))
+            self._print_stats()
+            print()
+            if self.ponderer is not None:
+                self.ponderer.start()
         else:
             print("AI has no valid moves!")
 
+    def _record(self, move, player, start, score=None, source=None):
+        if self.recorder is not None and move:
+            self.recorder.add(move, player, (time.perf_counter() - start) * 1000, score, source)
+
     def _make_ai_move(self, move, player, ai_name):
         if move:
             self.game.makeMove(move, player)
-            print(f"{ai_name} plays at {move}\n")
+            print(f"{ai_name} plays at {move}")
+            self._print_stats()
+            print()
         else:
             print(f"{ai_name} has no valid moves!")
 
+    def _reset_stats(self):
+        if self.stats is not None:
+            self.stats.reset()
+
+    def _print_stats(self):
+        if self.stats is not None:
+            print(f"Search: {self.stats.summary()}")
+
     def _print_board(self):
         print("\nCurrent Board:")
         for i, row in enumerate(self.game.board):
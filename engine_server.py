@@ -0,0 +1,207 @@
+import argparse
+import sys
+import time
+
+import opening_book
+from game_state import GameState
+from gameplay import gamePlay
+
+ABOUT = 'name="gomoku-solver", version="1.0", author="Gomoku Game Solver", country="-"'
+# kept back from each turn's budget for move generation and the reply itself
+SAFETY_MS = 50
+
+
+class EngineServer:
+    # plays gamePlay over the piskvork (Gomocup) text protocol: one command per
+    # line on stdin, one reply per line on stdout. coordinates are "x,y" with x
+    # the column, so the protocol's x,y is the board's (y, x). the engine is
+    # always gamePlay's AI and the opponent its HUMAN. one game is kept per
+    # board size for the life of the process, so the transposition table, the
+    # history and the opening book stay warm across moves and games
+    def __init__(self, output=sys.stdout, max_depth=20, verbose=False):
+        self.output = output
+        self.max_depth = max_depth
+        self.verbose = verbose
+        self.games = {}
+        self.game = None
+        self.moves = []
+        self.timeout_turn = 5000
+        self.timeout_match = None
+        self.time_left = None
+        self.running = True
+
+    def send(self, line):
+        self.output.write(line + "\n")
+        self.output.flush()
+
+    def run(self, lines):
+        lines = iter(lines)
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            command, _, args = line.partition(" ")
+            handler = getattr(self, "cmd_" + command.upper(), None)
+            if handler is None:
+                self.send(f"UNKNOWN {command}")
+                continue
+            try:
+                handler(args.strip(), lines)
+            except ValueError as e:
+                self.send(f"ERROR {e}")
+            if not self.running:
+                break
+
+    def new_game(self, width, height):
+        if not 5 <= width <= 255 or not 5 <= height <= 255:
+            raise ValueError(f"unsupported board size {width}x{height}")
+        game = self.games.get((width, height))
+        if game is None:
+            game = gamePlay(width, height)
+            game.book = opening_book.load_default(width, height)
+            self.games[(width, height)] = game
+        else:
+            game.load_snapshot(GameState(width, height))
+        self.game = game
+        self.moves = []
+
+    def parse_move(self, text):
+        try:
+            x, y = (int(part) for part in text.split(",")[:2])
+        except ValueError:
+            raise ValueError(f"bad coordinates: {text}") from None
+        if self.game is None:
+            raise ValueError("no game, send START first")
+        if not self.game.checkValidation(y, x):
+            raise ValueError(f"coordinates off the board: {text}")
+        return y, x
+
+    def play(self, move, player):
+        if self.game.board[move[0]][move[1]] != 0:
+            raise ValueError(f"square {move[1]},{move[0]} is occupied")
+        self.game.makeMove(move, player)
+        self.moves.append(move)
+
+    def turn_budget(self):
+        # milliseconds for this move: the per-turn limit, and no more than a
+        # fifteenth of what is left of the match
+        budget = self.timeout_turn
+        if self.time_left is not None:
+            budget = min(budget, self.time_left / 15)
+        return max(budget - SAFETY_MS, 1)
+
+    def think(self):
+        game = self.game
+        if game.stone_count == game.width * game.height:
+            raise ValueError("the board is full")
+        game.curr_player = game.AI
+        start = time.perf_counter()
+        if self.timeout_turn == 0:
+            # "as fast as possible"
+            score, move = game.search(max_depth=1)
+        else:
+            score, move = game.search(time_budget_ms=self.turn_budget(), max_depth=self.max_depth)
+        if move is None:
+            raise ValueError("no move found")
+        self.play(move, game.AI)
+        if self.verbose:
+            self.send(f"MESSAGE depth {game.depth_reached} score {score} nodes {game.nodes} "
+                      f"time {(time.perf_counter() - start) * 1000:.0f}ms")
+        self.send(f"{move[1]},{move[0]}")
+
+    def cmd_START(self, args, lines):
+        try:
+            size = int(args)
+        except ValueError:
+            raise ValueError(f"bad board size: {args}") from None
+        self.new_game(size, size)
+        self.send("OK")
+
+    def cmd_RECTSTART(self, args, lines):
+        try:
+            width, height = (int(part) for part in args.split(","))
+        except ValueError:
+            raise ValueError(f"bad board size: {args}") from None
+        self.new_game(width, height)
+        self.send("OK")
+
+    def cmd_RESTART(self, args, lines):
+        if self.game is None:
+            raise ValueError("no game, send START first")
+        self.new_game(self.game.width, self.game.height)
+        self.send("OK")
+
+    def cmd_BEGIN(self, args, lines):
+        if self.game is None:
+            raise ValueError("no game, send START first")
+        self.think()
+
+    def cmd_TURN(self, args, lines):
+        self.play(self.parse_move(args), self.game.HUMAN)
+        self.think()
+
+    def cmd_BOARD(self, args, lines):
+        # "x,y,who" lines up to DONE, in the order they were played; who is 1
+        # for the engine's stones and 2 for the opponent's
+        if self.game is None:
+            raise ValueError("no game, send START first")
+        self.new_game(self.game.width, self.game.height)
+        error = None
+        for line in lines:
+            line = line.strip()
+            if line.upper() == "DONE":
+                break
+            if error is not None or not line:
+                continue
+            try:
+                parts = line.split(",")
+                if len(parts) != 3 or parts[2].strip() not in ("1", "2"):
+                    raise ValueError(f"bad board line: {line}")
+                who = self.game.AI if parts[2].strip() == "1" else self.game.HUMAN
+                self.play(self.parse_move(line), who)
+            except ValueError as e:
+                error = str(e)
+        if error is not None:
+            raise ValueError(error)
+        self.think()
+
+    def cmd_TAKEBACK(self, args, lines):
+        move = self.parse_move(args)
+        if move not in self.moves:
+            raise ValueError(f"no stone at {args}")
+        self.moves.remove(move)
+        self.game.setCell(move[0], move[1], 0)
+        self.game.last_move = self.moves[-1] if self.moves else None
+        self.send("OK")
+
+    def cmd_INFO(self, args, lines):
+        key, _, value = args.partition(" ")
+        try:
+            if key == "timeout_turn":
+                self.timeout_turn = int(value)
+            elif key == "timeout_match":
+                self.timeout_match = int(value)
+            elif key == "time_left":
+                self.time_left = int(value)
+        except ValueError:
+            pass
+        # other keys (max_memory, game_type, rule, folder, ...) are ignored
+
+    def cmd_ABOUT(self, args, lines):
+        self.send(ABOUT)
+
+    def cmd_END(self, args, lines):
+        self.running = False
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gomoku engine speaking the piskvork protocol on stdin/stdout")
+    parser.add_argument("--max-depth", type=int, default=20, help="deepest iteration; time usually stops it first")
+    parser.add_argument("--verbose", action="store_true", help="send a MESSAGE with search stats after each move")
+    args = parser.parse_args(argv)
+    EngineServer(max_depth=args.max_depth, verbose=args.verbose).run(sys.stdin)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
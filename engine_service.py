@@ -0,0 +1,350 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import opening_book
+from game_state import GameState
+from gameplay import gamePlay
+
+DEFAULT_PORT = 7777
+# latencies kept for the percentiles
+LATENCY_WINDOW = 1000
+
+# one game per board size in each worker process, reused (and its transposition
+# table kept warm) across requests and games
+_worker_games = {}
+
+
+def _worker_game(state):
+    game = _worker_games.get((state.width, state.height))
+    if game is None:
+        game = gamePlay(state.width, state.height)
+        game.book = opening_book.load_default(state.width, state.height)
+        _worker_games[(state.width, state.height)] = game
+    game.load_snapshot(state)
+    return game
+
+
+def search_position(state, budget_ms, max_depth):
+    # runs in a worker: the engine's (AI's) move for `state`, or no move when the
+    # opponent's last move already won. returns (score, move, winner, depth, nodes, ms)
+    game = _worker_game(state)
+    winner = game.checkWinner()
+    if winner:
+        return None, None, winner, 0, 0, 0.0
+    start = time.perf_counter()
+    score, move = game.search(time_budget_ms=budget_ms, max_depth=max_depth)
+    ms = (time.perf_counter() - start) * 1000
+    if move is not None:
+        game.makeMove(move, game.AI)
+        winner = game.checkWinner()
+    return score, move, winner, game.depth_reached, game.nodes, ms
+
+
+def percentiles(values):
+    if not values:
+        return None
+    values = sorted(values)
+    last = len(values) - 1
+    return {
+        "p50": round(values[last * 50 // 100], 1),
+        "p90": round(values[last * 90 // 100], 1),
+        "p99": round(values[last * 99 // 100], 1),
+        "max": round(values[last], 1),
+    }
+
+
+class ServiceGame:
+    # a hosted game: its position (the engine's stones are gamePlay's AI, the
+    # client's its HUMAN), its search budget and the requests waiting on it
+    def __init__(self, game_id, state, budget_ms):
+        self.id = game_id
+        self.state = state
+        self.budget_ms = budget_ms
+        self.pending = deque()
+        self.running = False
+
+
+class EngineService:
+    # hosts many games at once over JSON lines on a local socket. searches run
+    # on a bounded process pool; a game has at most one search running and its
+    # requests are served in order, while games with work waiting take turns
+    # for free workers round robin, so a busy game can't starve the others.
+    # requests (each may carry an "id", echoed in the reply):
+    #   {"op": "new", "game": "g1", "size": 15, "budget_ms": 1000, "moves": [[x, y, player], ...]}
+    #   {"op": "move", "game": "g1", "move": [x, y]}  the client's move, or none
+    #                                                 for the engine to move first
+    #   {"op": "end", "game": "g1"}
+    #   {"op": "stats"}
+    # moves are (row, col) as everywhere in gamePlay; in "moves" player 1 is the
+    # engine and 2 the client
+    def __init__(self, workers=None, max_budget_ms=5000, max_depth=20, max_queue=1000):
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        self.max_budget_ms = max_budget_ms
+        self.max_depth = max_depth
+        self.max_queue = max_queue
+        self.games = {}
+        # ids of games with requests waiting and no search running, in turn order
+        self.ready = deque()
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.waits = deque(maxlen=LATENCY_WINDOW)
+        self.server = None
+        self.connections = set()
+
+    async def stop(self, grace=1.0):
+        # stop listening, give open connections `grace` seconds to finish, then
+        # drop them and the pool
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self.connections:
+            _, running = await asyncio.wait(self.connections, timeout=grace)
+            for task in running:
+                task.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
+        self.executor.shutdown(cancel_futures=True)
+
+    async def handle(self, request):
+        op = request.get("op")
+        try:
+            if op == "move":
+                reply = await self.request_move(request)
+            elif op == "new":
+                reply = self.new_game(request)
+            elif op == "end":
+                reply = self.end_game(request)
+            elif op == "stats":
+                reply = self.stats()
+            else:
+                raise ValueError(f"unknown op: {op}")
+        except (ValueError, TypeError, KeyError) as e:
+            reply = {"error": str(e)}
+        if "id" in request:
+            reply["id"] = request["id"]
+        return reply
+
+    def new_game(self, request):
+        game_id = request["game"]
+        if game_id in self.games and (self.games[game_id].pending or self.games[game_id].running):
+            raise ValueError(f"game {game_id} is busy")
+        width = int(request.get("width", request.get("size", 15)))
+        height = int(request.get("height", width))
+        if not 5 <= width <= 255 or not 5 <= height <= 255:
+            raise ValueError(f"unsupported board size {width}x{height}")
+        state = GameState(width, height)
+        for x, y, player in request.get("moves", ()):
+            self._play(state, (x, y), player)
+        budget_ms = self._budget(request.get("budget_ms", 1000), self.max_budget_ms)
+        self.games[game_id] = ServiceGame(game_id, state, budget_ms)
+        return {"ok": True}
+
+    def end_game(self, request):
+        game = self.games.pop(request["game"], None)
+        if game is None:
+            raise ValueError(f"no game {request['game']}")
+        for _, future, _ in game.pending:
+            if not future.done():
+                future.set_result({"error": "game ended"})
+        self.queued -= len(game.pending)
+        game.pending.clear()
+        return {"ok": True}
+
+    def stats(self):
+        return {
+            "games": len(self.games),
+            "workers": self.workers,
+            "queued": self.queued,
+            "running": self.running,
+            "completed": self.completed,
+            "latency_ms": percentiles(self.latencies),
+            "queue_ms": percentiles(self.waits),
+        }
+
+    @staticmethod
+    def _budget(value, limit):
+        # search(time_budget_ms=0) would set no deadline at all and hold a worker
+        # until max_depth, so a budget has to be positive
+        budget_ms = int(value)
+        if budget_ms <= 0:
+            raise ValueError(f"budget_ms must be positive: {value}")
+        return min(budget_ms, limit)
+
+    @staticmethod
+    def _play(state, move, player):
+        x, y = move
+        if player not in (1, 2):
+            raise ValueError(f"bad player: {player}")
+        if not (0 <= x < state.height and 0 <= y < state.width):
+            raise ValueError(f"move off the board: {list(move)}")
+        if state.get(x, y) != 0:
+            raise ValueError(f"square {list(move)} is occupied")
+        state.play((x, y), player)
+
+    async def request_move(self, request):
+        game = self.games.get(request["game"])
+        if game is None:
+            raise ValueError(f"no game {request['game']}")
+        if self.queued >= self.max_queue:
+            raise ValueError("overloaded, try again later")
+        future = asyncio.get_running_loop().create_future()
+        game.pending.append((request, future, time.perf_counter()))
+        self.queued += 1
+        if not game.running and len(game.pending) == 1:
+            self.ready.append(game.id)
+        self._dispatch()
+        return await future
+
+    def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        while self.running < self.workers and self.ready:
+            game = self.games.get(self.ready.popleft())
+            if game is None or game.running or not game.pending:
+                continue
+            request, future, received = game.pending.popleft()
+            self.queued -= 1
+            # the client's move is applied in queue order, so it sees every
+            # earlier reply's engine move
+            state = game.state.clone()
+            try:
+                if request.get("move") is not None:
+                    self._play(state, tuple(request["move"]), 2)
+                budget_ms = self._budget(request.get("budget_ms", game.budget_ms), game.budget_ms)
+            except (ValueError, TypeError) as e:
+                future.set_result({"error": str(e)})
+                if game.pending:
+                    self.ready.append(game.id)
+                continue
+            state.curr_player = 1
+            game.running = True
+            self.running += 1
+            started = time.perf_counter()
+            task = loop.run_in_executor(self.executor, search_position, state,
+                                        budget_ms, self.max_depth)
+            task.add_done_callback(
+                lambda task, game=game, state=state, future=future, received=received, started=started:
+                self._finished(task, game, state, future, received, started))
+
+    def _finished(self, task, game, state, future, received, started):
+        self.running -= 1
+        game.running = False
+        try:
+            score, move, winner, depth, nodes, ms = task.result()
+        except Exception as e:
+            reply = {"error": f"search failed: {e}"}
+        else:
+            if move is not None:
+                state.play(move, 1)
+            # the game may have been ended (and even recreated) meanwhile
+            if self.games.get(game.id) is game:
+                game.state = state
+            now = time.perf_counter()
+            wait_ms = (started - received) * 1000
+            latency_ms = (now - received) * 1000
+            self.latencies.append(latency_ms)
+            self.waits.append(wait_ms)
+            self.completed += 1
+            reply = {
+                "move": list(move) if move is not None else None,
+                "winner": winner,
+                "score": score if score not in (float('inf'), -float('inf')) else None,
+                "depth": depth,
+                "nodes": nodes,
+                "search_ms": round(ms, 1),
+                "queue_ms": round(wait_ms, 1),
+                "latency_ms": round(latency_ms, 1),
+            }
+        if not future.done():
+            future.set_result(reply)
+        if game.pending and self.games.get(game.id) is game:
+            self.ready.append(game.id)
+        self._dispatch()
+
+    async def serve_client(self, reader, writer):
+        # requests on one connection are answered as they finish, not in order
+        connection = asyncio.current_task()
+        self.connections.add(connection)
+        tasks = set()
+
+        async def respond(request):
+            reply = await self.handle(request)
+            writer.write((json.dumps(reply, separators=(",", ":")) + "\n").encode())
+            await writer.drain()
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError
+                except ValueError:
+                    writer.write(b'{"error":"bad request"}\n')
+                    continue
+                task = asyncio.create_task(respond(request))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        except ConnectionError:
+            pass
+        finally:
+            self.connections.discard(connection)
+            writer.close()
+
+    async def start(self, host="127.0.0.1", port=DEFAULT_PORT, path=None):
+        # start every worker before accepting connections: a worker forked later
+        # would inherit the open sockets and keep them from ever closing
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.executor, os.getpid)
+                               for _ in range(self.workers)))
+        if path is not None:
+            self.server = await asyncio.start_unix_server(self.serve_client, path=path)
+        else:
+            self.server = await asyncio.start_server(self.serve_client, host, port)
+        return self.server
+
+
+async def _serve(args):
+    service = EngineService(args.workers, args.max_budget, args.max_depth, args.max_queue)
+    server = await service.start(args.host, args.port, args.unix)
+    where = args.unix or ":".join(str(part) for part in server.sockets[0].getsockname()[:2])
+    print(f"Engine service on {where} with {service.workers} workers", file=sys.stderr)
+    try:
+        await server.serve_forever()
+    finally:
+        await service.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Host many games over JSON lines on a local socket")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", default=None, help="listen on a unix socket at this path instead")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--max-budget", type=int, default=5000, help="largest per-move budget in ms")
+    parser.add_argument("--max-depth", type=int, default=20)
+    parser.add_argument("--max-queue", type=int, default=1000,
+                        help="queued move requests beyond which new ones are refused")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+import gzip
+import json
+import os
+import sys
+import time
+
+from game_state import GameState
+
+# one game per line of a JSON lines file, so an archive can be appended to as
+# games finish and read back one game at a time:
+# {"version": 2, "width": 15, "height": 15, "mode": "human_vs_ai",
+#  "black": {"algo": "alphabeta", "depth": 3}, "white": {"algo": "human"},
+#  "started": 1700000000.0, "winner": 2, "end": "win",
+#  "moves": [[x, y, player, ms, eval, source], ...]}
+# black is player 1 (the AI side of gamePlay) and a side's algo is the one it
+# was set to play with. ms is the time the move took, eval the score the engine
+# reported when it chose the move and source what actually chose it ("pvs",
+# "alphabeta", "minimax", "book", "threat", "ponder" or "fallback"), both null
+# for a human. version 1 records have no source
+VERSION = 2
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "games.jsonl")
+
+
+def side(algo, depth=None):
+    # a header entry for one side
+    if depth is None:
+        return {"algo": algo}
+    return {"algo": algo, "depth": depth}
+
+
+class GameRecorder:
+    # collects the moves of the game being played and appends the record to
+    # `path` when it ends. start() begins the next game on the same recorder
+    def __init__(self, width, height, mode, black, white, path=DEFAULT_PATH):
+        self.path = path
+        self.header = {"version": VERSION, "width": width, "height": height, "mode": mode,
+                       "black": black, "white": white}
+        self.start()
+
+    def start(self):
+        self.moves = []
+        self.started = time.time()
+
+    def add(self, move, player, ms=None, score=None, source=None):
+        if ms is not None:
+            ms = round(ms, 1)
+        if score is not None and score not in (float('inf'), -float('inf')):
+            score = int(score)
+        else:
+            score = None
+        self.moves.append([move[0], move[1], player, ms, score, source])
+
+    def finish(self, winner=0, end=None):
+        # end is "win", "draw" or "abandoned"; games without moves are dropped
+        if not self.moves:
+            return None
+        if end is None:
+            end = "win" if winner else "abandoned"
+        record = dict(self.header, started=round(self.started, 3), winner=winner, end=end,
+                      moves=self.moves)
+        with open(self.path, "a") as f:
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self.start()
+        return record
+
+
+def read_records(path):
+    # the records of a file one at a time, without reading the whole file.
+    # "-" reads stdin and a .gz file is decompressed on the fly
+    if path == "-":
+        yield from _parse(sys.stdin)
+        return
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt") as f:
+        yield from _parse(f)
+
+
+def _parse(lines):
+    for line in lines:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def positions(record):
+    # (position before the move, move, player, ms, eval) for each move of a record
+    state = GameState(record["width"], record["height"])
+    for x, y, player, ms, score, *_ in record["moves"]:
+        state.curr_player = player
+        yield state.clone(), (x, y), player, ms, score
+        state.play((x, y), player)
@@ -0,0 +1,100 @@
+import random
+
+AI = 1
+HUMAN = 2
+
+_zobrist_tables = {}
+
+
+def zobrist_table(width, height):
+    # per-cell keys for (empty, AI, HUMAN) plus the side-to-move key, from a fixed
+    # seed so every instance and worker process hashes a position the same way
+    table = _zobrist_tables.get((width, height))
+    if table is None:
+        rng = random.Random(width * 1000 + height)
+        keys = [[(0, rng.getrandbits(64), rng.getrandbits(64)) for _ in range(width)]
+                for _ in range(height)]
+        table = (keys, rng.getrandbits(64))
+        _zobrist_tables[(width, height)] = table
+    return table
+
+
+class GameState:
+    # a position on its own: the board as a flat bytearray (cell x * width + y),
+    # the side to move and the last move, with the zobrist key of the stones kept
+    # up to date by set(). cloning is a bytearray copy and a pickle is the board
+    # bytes plus a few small fields. hash() comes from the same key (with the
+    # side to move folded in the way gamePlay's transposition table does), so
+    # states work directly as cache keys; don't mutate one while it is in a dict
+    __slots__ = ("width", "height", "cells", "last_move", "curr_player", "key", "stone_count")
+
+    def __init__(self, width, height, cells=None, last_move=None, curr_player=AI, key=None):
+        self.width = width
+        self.height = height
+        self.cells = bytearray(cells) if cells is not None else bytearray(width * height)
+        if len(self.cells) != width * height:
+            raise ValueError("Board has the wrong number of cells")
+        self.last_move = tuple(last_move) if last_move is not None else None
+        self.curr_player = curr_player
+        self.stone_count = width * height - self.cells.count(0)
+        if key is None:
+            zobrist, _ = zobrist_table(width, height)
+            key = 0
+            for i, value in enumerate(self.cells):
+                if value:
+                    key ^= zobrist[i // width][i % width][value]
+        self.key = key
+
+    def get(self, x, y):
+        return self.cells[x * self.width + y]
+
+    def set(self, x, y, value):
+        i = x * self.width + y
+        old = self.cells[i]
+        if old == value:
+            return
+        keys = zobrist_table(self.width, self.height)[0][x][y]
+        self.key ^= keys[old] ^ keys[value]
+        self.cells[i] = value
+        self.stone_count += (value != 0) - (old != 0)
+
+    def play(self, move, player):
+        self.set(move[0], move[1], player)
+        self.last_move = tuple(move)
+        self.curr_player = 3 - player
+
+    def rows(self):
+        width = self.width
+        return [list(self.cells[x * width:(x + 1) * width]) for x in range(self.height)]
+
+    def clone(self):
+        state = GameState.__new__(GameState)
+        state.width = self.width
+        state.height = self.height
+        state.cells = bytearray(self.cells)
+        state.last_move = self.last_move
+        state.curr_player = self.curr_player
+        state.key = self.key
+        state.stone_count = self.stone_count
+        return state
+
+    __copy__ = clone
+
+    def __reduce__(self):
+        # the key is sent along so unpickling doesn't rehash the board
+        return (GameState, (self.width, self.height, bytes(self.cells), self.last_move,
+                            self.curr_player, self.key))
+
+    def __hash__(self):
+        _, side_key = zobrist_table(self.width, self.height)
+        return self.key ^ side_key if self.curr_player == AI else self.key
+
+    def __eq__(self, other):
+        if not isinstance(other, GameState):
+            return NotImplemented
+        return (self.width == other.width and self.height == other.height and
+                self.curr_player == other.curr_player and self.cells == other.cells)
+
+    def __repr__(self):
+        return (f"GameState({self.width}x{self.height}, {self.stone_count} stones, "
+                f"to move {self.curr_player}, key {self.key:016x})")
@@ -1,21 +1,236 @@
+import time
+
+import symmetry
+from game_state import GameState, zobrist_table
+from patterns import SCORE_MASK, AI_WIN_MASK, HUMAN_WIN_MASK, window_shift, default_table
+from threats import ThreatSearch
+from transposition import TranspositionTable, EXACT, LOWER, UPPER
+
+INF = float('inf')
+
 class gamePlay:
-    def __init__(self,width,height):
+    AI = 1
+    HUMAN = 2
+    moves8 = ((1, 0), (0, 1), (-1, 0), (0, -1), (1, 1), (-1, 1), (1, -1), (-1, -1))
+    dirs = ((1, 0), (1, 1), (1, -1), (0, 1))
+
+    def __init__(self,width,height,backend="list",tt_size=1 << 16,tt_replacement="depth",evaluator="incremental",beam_width=40,patterns=None):
         self.width = width
         self.height = height
-        self.AI = 1
-        self.HUMAN = 2
+        self.backend = backend
         self.board = [[0] * self.width for _ in range(self.height)]
-        self.moves8 = [(1, 0), (0, 1), (-1, 0), (0, -1), (1, 1), (-1, 1), (1, -1), (-1, -1)]
-        self.dirs = [(1,0),(1,1),(1,-1),(0,1)]
+        # the bitboard backend keeps per-player bit masks next to the list board,
+        # for shift/AND five detection in is_winning_move
+        self.bits = None
+        if backend == "bitboard":
+            from bitboard import BitBoard
+            self.bits = BitBoard(width, height)
         self.last_move = None
         self.curr_player = self.AI
+        self.beam_width = beam_width
+        self.threat_budget = 2000
+        # opening book consulted by search() before anything else, see opening_book.py
+        self.book = None
+        # move ordering heuristics used by alphabeta, each can be switched off.
+        # pv_ordering only applies to games without a transposition table
+        self.killer_moves = True
+        self.history_heuristic = True
+        self.pv_ordering = True
+        self.aspiration_window = 10000
+        # key the transposition table by the position's smallest hash over all its
+        # rotations and reflections, so equivalent orientations share entries
+        self.symmetric_tt = True
+        self.patterns = patterns or default_table()
+        self.flat = bytearray(self.width * self.height)
+        self._build_lines()
+        self._build_zobrist()
+        self._build_frontier()
+        self.tt = TranspositionTable(tt_size, tt_replacement) if tt_size else None
+        self._build_ordering()
+        self._build_buffers()
+        self.nodes = 0
+        self.depth_reached = 0
+        # what chose search()'s last move: "book", "threat", the algorithm that
+        # iterated, or "fallback" when no iteration finished
+        self.search_source = None
+        self.deadline = None
+        self.stopped = False
+        # set while search() iterates, so its inner calls don't clear a cancel()
+        self.searching = False
+        self.stats = None
+        self.numpy_eval = None
+        if evaluator == "numpy":
+            from numpy_eval import NumpyEvaluator
+            self.numpy_eval = NumpyEvaluator(self)
+
+    def _build_zobrist(self):
+        # shared with GameState, so a snapshot's key is this game's hash
+        self.zobrist, self.side_key = zobrist_table(self.width, self.height)
+        self.hash = 0
+        # the hash of every orientation the board has (8 when square, 4 otherwise),
+        # updated together by setCell: sym_zobrist[x][y][value] holds the key of
+        # (x, y) seen through each symmetry, and sym_cells[i][x][y] is (x, y) moved
+        # by symmetry i, with sym_inverse[i] undoing it
+        self.symmetry_ids = tuple(symmetry.symmetries(self.width, self.height))
+        self.sym_hashes = [0] * len(self.symmetry_ids)
+        self.sym_cells = [[[symmetry.transform((x, y), s, self.width, self.height)
+                            for y in range(self.width)] for x in range(self.height)]
+                          for s in self.symmetry_ids]
+        self.sym_inverse = tuple(self.symmetry_ids.index(symmetry.INVERSE[s]) for s in self.symmetry_ids)
+        self.sym_zobrist = [[[tuple(self.zobrist[cells[x][y][0]][cells[x][y][1]][value]
+                                    for cells in self.sym_cells) for value in range(3)]
+                             for y in range(self.width)] for x in range(self.height)]
+
+    def _build_ordering(self):
+        # killers are kept per stone count, which is the ply for a given root and
+        # lines up from one turn to the next; history is per player and cell; the
+        # principal variation maps the alphabeta key of each position on it to its move
+        cells = self.width * self.height
+        self.killers = [[None, None] for _ in range(cells + 1)]
+        self.history = (None, {}, {})
+        for history in self.history[1:]:
+            for x in range(self.height):
+                for y in range(self.width):
+                    history[(x, y)] = 0
+        self.history_keys = (None, self.history[1].__getitem__, self.history[2].__getitem__)
+        self.pv_table = [[] for _ in range(cells + 2)]
+        self.pv = []
+        self.pv_moves = {}
+
+    def _build_buffers(self):
+        # everything the search core writes per ply, allocated once: the undo stack,
+        # a move list and best move per ply, and the candidate scores generateMoves sorts by
+        cells = self.width * self.height
+        self.undo_moves = [None] * (cells + 1)
+        self.undo_last_move = [None] * (cells + 1)
+        self.undo_curr_player = [None] * (cells + 1)
+        self.move_buffers = [[] for _ in range(cells + 1)]
+        self.best_moves = [None] * (cells + 1)
+        self.table_symmetry = [0] * (cells + 1)
+        self.candidate_scores = {}
+        self.candidate_key = self.candidate_scores.__getitem__
+
+    def _build_lines(self):
+        # every row, column and diagonal of the board, plus (line id, key shift) of the four lines through each cell
+        self.lines = []
+        self.cell_lines = [[[] for _ in range(self.width)] for _ in range(self.height)]
+        for dx, dy in self.dirs:
+            for x in range(self.height):
+                for y in range(self.width):
+                    if self.checkValidation(x - dx, y - dy):
+                        continue
+                    cells = []
+                    nx, ny = x, y
+                    while self.checkValidation(nx, ny):
+                        self.cell_lines[nx][ny].append((len(self.lines), 2 * len(cells)))
+                        cells.append((nx, ny))
+                        nx += dx
+                        ny += dy
+                    self.lines.append(cells)
+        # each line's cells as a base-4 key, and the pattern table's score for it
+        self.line_lengths = [len(cells) for cells in self.lines]
+        self.line_keys = [0] * len(self.lines)
+        self.line_scores = [0] * len(self.lines)
+        self.line_total = 0
+
+    def _build_frontier(self):
+        # empty cells next to at least one stone, with how many stones touch each of them
+        self.neighbours = [[[(x + dx, y + dy) for dx, dy in self.moves8 if self.checkValidation(x + dx, y + dy)]
+                            for y in range(self.width)] for x in range(self.height)]
+        # window_keys[4 * cell + d]: the 8 cells around `cell` along direction d as a
+        # pattern table key; key_updates[x][y] lists the keys a stone at (x, y) changes
+        self.window_keys = [0] * (4 * self.width * self.height)
+        self.key_updates = [[[] for _ in range(self.width)] for _ in range(self.height)]
+        for x in range(self.height):
+            for y in range(self.width):
+                for d, (dx, dy) in enumerate(self.dirs):
+                    index = 4 * (x * self.width + y) + d
+                    for offset in (-4, -3, -2, -1, 1, 2, 3, 4):
+                        nx, ny = x + dx * offset, y + dy * offset
+                        if self.checkValidation(nx, ny):
+                            self.key_updates[nx][ny].append((index, window_shift(offset)))
+                        else:
+                            self.window_keys[index] |= 3 << window_shift(offset)
+        self.neighbour_count = [[0] * self.width for _ in range(self.height)]
+        self.frontier = set()
+        self.stone_count = 0
+
+    def setCell(self, x, y, value):
+        if self.board[x][y] == value:
+            return
+        old = self.board[x][y]
+        keys = self.zobrist[x][y]
+        self.hash ^= keys[old] ^ keys[value]
+        sym_keys = self.sym_zobrist[x][y]
+        old_keys, new_keys = sym_keys[old], sym_keys[value]
+        sym_hashes = self.sym_hashes
+        for i, key in enumerate(old_keys):
+            sym_hashes[i] ^= key ^ new_keys[i]
+        self.board[x][y] = value
+        self.flat[x * self.width + y] = value
+        if self.bits is not None:
+            self.bits.set(x, y, value)
+        if old == 0:
+            self.stone_count += 1
+            self.frontier.discard((x, y))
+            for nx, ny in self.neighbours[x][y]:
+                self.neighbour_count[nx][ny] += 1
+                if self.board[nx][ny] == 0:
+                    self.frontier.add((nx, ny))
+        elif value == 0:
+            self.stone_count -= 1
+            for nx, ny in self.neighbours[x][y]:
+                self.neighbour_count[nx][ny] -= 1
+                if self.neighbour_count[nx][ny] == 0:
+                    self.frontier.discard((nx, ny))
+            if self.neighbour_count[x][y]:
+                self.frontier.add((x, y))
+        delta = value - old
+        window_keys = self.window_keys
+        for index, shift in self.key_updates[x][y]:
+            window_keys[index] += delta << shift
+        if self.numpy_eval is not None:
+            self.numpy_eval.set(x, y, value)
+            return
+        line_keys = self.line_keys
+        line_scores = self.line_scores
+        for line_id, shift in self.cell_lines[x][y]:
+            key = line_keys[line_id] + (delta << shift)
+            line_keys[line_id] = key
+            score = self.patterns.line_score(key, self.line_lengths[line_id])
+            self.line_total += score - line_scores[line_id]
+            line_scores[line_id] = score
+
+    def snapshot(self):
+        # a GameState copy of the position, O(1) apart from copying the flat board
+        return GameState(self.width, self.height, self.flat, self.last_move, self.curr_player, self.hash)
+
+    def load_snapshot(self, state):
+        if (state.width, state.height) != (self.width, self.height):
+            raise ValueError("Snapshot is for a different board size")
+        flat = self.flat
+        width = self.width
+        for i, value in enumerate(state.cells):
+            if flat[i] != value:
+                self.setCell(i // width, i % width, value)
+        # a fresh set iterates in an order that depends only on the position, not on
+        # the moves this game played before; generateMoves breaks ties in that order
+        self.frontier = set(sorted(self.frontier))
+        self.last_move = state.last_move
+        self.curr_player = state.curr_player
+
+    @classmethod
+    def from_snapshot(cls, state, **kwargs):
+        game = cls(state.width, state.height, **kwargs)
+        game.load_snapshot(state)
+        return game
 
     def checkValidation(self, x, y):
         return 0 <= x < self.height and 0 <= y < self.width
 
     def playround(self, move, round):
         x, y = move
-        self.board[x][y] = self.AI if round == self.AI else self.HUMAN
+        self.setCell(x, y, self.AI if round == self.AI else self.HUMAN)
         self.last_move = (x, y)
 
     def checkWinner(self):
@@ -27,36 +242,78 @@ class gamePlay:
             return player
         return 0
 
-    def generateMoves(self):
-        candidates = set()
-        for row in range(self.height):
-            for col in range(self.width):
-                if self.board[row][col] != 0:
-                    for dx, dy in self.moves8:
-                        nx, ny = row + dx, col + dy
-                        if self.checkValidation(nx, ny) and self.board[nx][ny] == 0:
-                            candidates.add((nx, ny))
-        if not candidates:
+    def generateMoves(self, moves=None):
+        # the beam_width best candidates, best first, written into `moves` when given
+        # (the search passes its per-ply buffer) or into a new list
+        if moves is None:
+            moves = []
+        else:
+            moves.clear()
+        moves.extend(self.frontier)
+        if not moves:
+            candidates = set()
             for row in range(self.height):
                 for col in range(self.width):
                     if self.board[row][col] == 0:
                         candidates.add((row, col))
-        if not candidates and self.board[self.height // 2][self.width // 2] == 0:
-            candidates.add((self.height // 2, self.width // 2))
-        scored = []
-        for (x, y) in candidates:
-            score = 0
-            if self.is_winning_move((x, y), self.AI):
-                score += 1000000
-            if self.is_winning_move((x, y), self.HUMAN):
-                score += 500000
-            for dx, dy in self.dirs:
-                score += self.score_position((x, y), dx, dy, self.AI)
-                score += self.score_position((x, y), dx, dy, self.HUMAN)
-            scored.append((score, x, y))
-
-        scored.sort(reverse=True, key=lambda s: s[0])
-        return [(x, y) for (_, x, y) in scored[:40]]
+            if not candidates and self.board[self.height // 2][self.width // 2] == 0:
+                candidates.add((self.height // 2, self.width // 2))
+            moves.extend(candidates)
+        self.score_candidates(moves, self.candidate_scores)
+        # a stable sort cut to the beam, so ties keep frontier order as heapq.nlargest
+        # would; it is the faster of the two at every frontier size (benchmarks/top_k.py)
+        moves.sort(key=self.candidate_key, reverse=True)
+        del moves[self.beam_width:]
+        return moves
+
+    def score_candidates(self, cells, out=None):
+        # score_candidate for empty cells from four pattern table lookups each, as a
+        # list, or stored as out[cell] when a dict is passed in
+        keys = self.window_keys
+        table = self.patterns.candidate_table
+        ai_bonus = self.patterns.ai_win_bonus
+        human_bonus = self.patterns.human_win_bonus
+        width = self.width
+        scores = [] if out is None else None
+        for cell in cells:
+            x, y = cell
+            i = 4 * (x * width + y)
+            total = table[keys[i]] + table[keys[i + 1]] + table[keys[i + 2]] + table[keys[i + 3]]
+            score = total & SCORE_MASK
+            if total & AI_WIN_MASK:
+                score += ai_bonus
+            if total & HUMAN_WIN_MASK:
+                score += human_bonus
+            if out is None:
+                scores.append(score)
+            else:
+                out[cell] = score
+        return scores if out is None else out
+
+    def score_candidate(self, x, y):
+        score = 0
+        if self.is_winning_move((x, y), self.AI):
+            score += 1000000
+        if self.is_winning_move((x, y), self.HUMAN):
+            score += 500000
+        for dx, dy in self.dirs:
+            score += self.score_position((x, y), dx, dy, self.AI)
+            score += self.score_position((x, y), dx, dy, self.HUMAN)
+        return score
+
+    def winning_cells(self, player):
+        # empty cells where `player` would complete five, read off the window keys
+        keys = self.window_keys
+        table = self.patterns.candidate_table
+        mask = AI_WIN_MASK if player == self.AI else HUMAN_WIN_MASK
+        width = self.width
+        cells = []
+        for x, y in self.frontier:
+            i = 4 * (x * width + y)
+            if (table[keys[i]] | table[keys[i + 1]] | table[keys[i + 2]] | table[keys[i + 3]]) & mask:
+                cells.append((x, y))
+        return cells
+
     def score_position(self, pos, dx, dy, player):
         x, y = pos
         score = 0
@@ -89,16 +346,18 @@ class gamePlay:
         return score
     def makeMove(self, move, player):
         x, y = move
-        self.board[x][y] = player
+        self.setCell(x, y, player)
         self.curr_player = 3-player
         self.last_move = (x, y)
 
     def undoMove(self, move):
         x, y = move
-        self.board[x][y] = 0
+        self.setCell(x, y, 0)
 
     def is_winning_move(self, move, player):
         x, y = move
+        if self.bits is not None:
+            return self.bits.makes_five(x, y, player)
         for dx, dy in self.dirs:
             count = 1
             nx, ny = x + dx, y + dy
@@ -114,34 +373,49 @@ class gamePlay:
             if count >= 5:
                 return True
         return False
+
+    def winning_line(self, move):
+        # the two end cells of the five (or longer run) made by the stone at `move`
+        x, y = move
+        player = self.board[x][y]
+        for dx, dy in self.dirs:
+            start, end = (x, y), (x, y)
+            nx, ny = x + dx, y + dy
+            while self.checkValidation(nx, ny) and self.board[nx][ny] == player:
+                end = (nx, ny)
+                nx += dx
+                ny += dy
+            nx, ny = x - dx, y - dy
+            while self.checkValidation(nx, ny) and self.board[nx][ny] == player:
+                start = (nx, ny)
+                nx -= dx
+                ny -= dy
+            if max(abs(end[0] - start[0]), abs(end[1] - start[1])) >= 4:
+                return start, end
+        return None
     def evaluate(self):
+        if self.numpy_eval is not None:
+            return self.numpy_eval.evaluate()
         winner = self.checkWinner()
         if winner == self.AI:
             return 10 ** 7
         elif winner == self.HUMAN:
             return -10 ** 7
+        return self.line_total
 
-        ai_weights = {
-            (4, 2): 10 ** 6,
-            (4, 1): 10 ** 5,
-            (3, 2): 10 ** 4,
-            (3, 1): 10 ** 3,
-            (2, 2): 10 ** 2,
-            (2, 1): 10,
-        }
-
-        human_weights = {
-            (4, 2): 10 ** 7,
-            (4, 1): 10 ** 6,
-            (3, 2): 10 ** 5,
-            (3, 1): 10 ** 4,
-            (2, 2): 10 ** 3,
-            (2, 1): 10 ** 2,
-        }
+    def evaluate_full(self):
+        winner = self.checkWinner()
+        if winner == self.AI:
+            return 10 ** 7
+        elif winner == self.HUMAN:
+            return -10 ** 7
+        if self.bits is not None:
+            return (self.bits.score(self.AI, self.patterns.ai_weights)
+                    - self.bits.score(self.HUMAN, self.patterns.human_weights))
 
         def score_player(player):
             total = 0
-            current_weights = ai_weights if player == self.AI else human_weights
+            current_weights = self.patterns.ai_weights if player == self.AI else self.patterns.human_weights
             for i in range(self.width*self.height):
                     tempi = i//self.height
                     tempj = i%self.height
@@ -172,74 +446,414 @@ class gamePlay:
         human_score = score_player(self.HUMAN)
         return ai_score - human_score
 
+
+    def push(self, move, player):
+        # makeMove that keeps what pop() needs on the undo stack, indexed by stone count
+        n = self.stone_count
+        self.undo_moves[n] = move
+        self.undo_last_move[n] = self.last_move
+        self.undo_curr_player[n] = self.curr_player
+        self.setCell(move[0], move[1], player)
+        self.curr_player = 3 - player
+        self.last_move = move
+
+    def pop(self):
+        n = self.stone_count - 1
+        move = self.undo_moves[n]
+        self.setCell(move[0], move[1], 0)
+        self.last_move = self.undo_last_move[n]
+        self.curr_player = self.undo_curr_player[n]
+
     def minimax(self, depth, maximizing):
-        if depth == 0 or self.checkWinner() != 0:
-            return self.evaluate(), None
+        self._begin()
+        score = self._search(depth, -INF, INF, maximizing, False)
+        return score, self.best_moves[self.stone_count]
 
-        best_move = None
-        if maximizing:
-            max_eval = -float('inf')
-            for move in self.generateMoves():
-                original_last_move = self.last_move
-                original_curr_player = self.curr_player
-                self.makeMove(move, self.AI)
-                eval_score, _ = self.minimax(depth - 1, False)
-                self.undoMove(move)
-                self.curr_player = original_curr_player
-                self.last_move = original_last_move
-                if eval_score > max_eval:
-                    max_eval, best_move = eval_score, move
-            return max_eval, best_move
+    def alphabeta(self, depth, alpha, beta, maximizing, first_move=None):
+        self._begin()
+        score = self._search(depth, alpha, beta, maximizing, True, first_move)
+        return score, self.best_moves[self.stone_count]
+
+    def _begin(self):
+        # a cancel() that came while no search was running was for one already over
+        if not self.searching:
+            self.stopped = False
+
+    def symmetry_keys(self):
+        # the position's hash per symmetry (see symmetry.py), None for those the board lacks
+        keys = [None] * 8
+        for i, s in enumerate(self.symmetry_ids):
+            keys[s] = self.sym_hashes[i]
+        return keys
+
+    def table_key(self, maximizing):
+        # transposition table key for the side to move. with symmetric_tt it comes from
+        # the smallest orientation hash, and the orientation used is left in
+        # table_symmetry[ply] for to_table/from_table to map moves through
+        ply = self.stone_count
+        if self.symmetric_tt:
+            hashes = self.sym_hashes
+            key = min(hashes)
+            self.table_symmetry[ply] = hashes.index(key)
         else:
-            min_eval = float('inf')
-            for move in self.generateMoves():
-                original_last_move = self.last_move
-                original_curr_player = self.curr_player
-                self.makeMove(move, self.HUMAN)
-                eval_score, _ = self.minimax(depth - 1, True)
-                self.undoMove(move)
-                self.curr_player = original_curr_player
-                self.last_move = original_last_move
-                if eval_score < min_eval:
-                    min_eval, best_move = eval_score, move
-            return min_eval, best_move
-
-    def alphabeta(self, depth, alpha, beta, maximizing):
+            key = self.hash
+            self.table_symmetry[ply] = 0
+        return key ^ self.side_key if maximizing else key
+
+    def to_table(self, move):
+        i = self.table_symmetry[self.stone_count]
+        return self.sym_cells[i][move[0]][move[1]] if i else move
+
+    def from_table(self, move):
+        i = self.table_symmetry[self.stone_count]
+        if i and move is not None:
+            return self.sym_cells[self.sym_inverse[i]][move[0]][move[1]]
+        return move
+
+    def order_moves(self, moves, maximizing, first_move=None, tt_move=None, pv_move=None, depth=0):
+        # history score first (the static order breaks ties, the sort is stable), then
+        # this ply's killers, the caller's first move, the TT move and the PV move,
+        # each put in front of the ones before. with the numpy evaluator, nodes with
+        # at least two plies left start from the children's evaluations, scored in
+        # one batch, instead of the static order
+        if self.numpy_eval is not None and depth >= 2:
+            moves[:] = self.numpy_eval.order_moves(moves, self.AI if maximizing else self.HUMAN)
+        if self.history_heuristic:
+            moves.sort(key=self.history_keys[self.AI if maximizing else self.HUMAN], reverse=True)
+        if self.killer_moves:
+            killers = self.killers[self.stone_count]
+            self._move_to_front(moves, killers[1])
+            self._move_to_front(moves, killers[0])
+        self._move_to_front(moves, first_move)
+        self._move_to_front(moves, tt_move)
+        self._move_to_front(moves, pv_move)
+        return moves
+
+    @staticmethod
+    def _move_to_front(moves, move):
+        if move is not None and move in moves:
+            moves.remove(move)
+            moves.insert(0, move)
+
+    def record_cutoff(self, move, depth, maximizing):
+        if self.killer_moves:
+            killers = self.killers[self.stone_count]
+            if killers[0] != move:
+                killers[1] = killers[0]
+                killers[0] = move
+        if self.history_heuristic:
+            self.history[self.AI if maximizing else self.HUMAN][move] += depth * depth
+
+    def age_history(self):
+        for history in self.history[1:]:
+            for cell in history:
+                history[cell] >>= 1
+
+    def clear_ordering(self):
+        # forget the killers, history and principal variation of earlier searches
+        self._build_ordering()
+
+    def remember_pv(self, maximizing):
+        # replay the principal variation of the last root search to get the key of
+        # every position on it, so the next iteration or turn can try it first
+        self.pv = list(self.pv_table[self.stone_count])
+        self.pv_moves = {}
+        key = self.hash
+        for x, y in self.pv:
+            self.pv_moves[key ^ self.side_key if maximizing else key] = (x, y)
+            key ^= self.zobrist[x][y][self.AI if maximizing else self.HUMAN]
+            maximizing = not maximizing
+
+    def _search(self, depth, alpha, beta, maximizing, prune, first_move=None):
+        # the search core behind minimax (prune=False: full width, no table and no
+        # move ordering) and alphabeta. returns the score and leaves the best move in
+        # best_moves[ply]; moves are generated into the ply's preallocated buffer and
+        # played with push/pop, so a node allocates nothing of its own
+        self.nodes += 1
+        if self.deadline is not None and self.nodes & 255 == 0 and time.perf_counter() > self.deadline:
+            self.stopped = True
+        ply = self.stone_count
+        best_moves = self.best_moves
+        best_moves[ply] = None
+        if self.stopped:
+            return 0
+        stats = self.stats
+        if stats is not None:
+            stats.nodes += 1
+            if depth > stats.depth:
+                stats.depth = depth
+        pv = self.pv_table[ply]
+        pv.clear()
         if depth == 0 or self.checkWinner() != 0:
-            return self.evaluate(), None
+            if stats is not None:
+                stats.leaves += 1
+            return self.evaluate()
+        tt = self.tt if prune else None
+        key = self.hash ^ self.side_key if maximizing else self.hash
+        tt_move = None
+        if tt is not None:
+            tt_key = self.table_key(maximizing)
+            entry = tt.probe(tt_key)
+            if entry is not None:
+                _, entry_depth, flag, entry_score, tt_move = entry
+                tt_move = self.from_table(tt_move)
+                if entry_depth >= depth:
+                    if flag == EXACT:
+                        best_moves[ply] = tt_move
+                        pv.append(tt_move)
+                        return entry_score
+                    if flag == LOWER:
+                        alpha = max(alpha, entry_score)
+                    else:
+                        beta = min(beta, entry_score)
+                    if beta <= alpha:
+                        best_moves[ply] = tt_move
+                        return entry_score
+        alpha_orig, beta_orig = alpha, beta
+        moves = self.generateMoves(self.move_buffers[ply])
+        if prune:
+            # with a table the PV move is already its move, so it only helps without one
+            pv_move = self.pv_moves.get(key) if self.pv_ordering and tt is None else None
+            self.order_moves(moves, maximizing, first_move, tt_move, pv_move, depth)
+        if stats is not None:
+            stats.interior += 1
+        player = self.AI if maximizing else self.HUMAN
+        child_pv = self.pv_table[ply + 1]
+        best_eval = -INF if maximizing else INF
         best_move = None
-        if maximizing:
-            max_eval = -float('inf')
-            for move in self.generateMoves():
-                original_last_move = self.last_move
-                original_curr_player = self.curr_player
-                self.makeMove(move, self.AI)
-                eval_score, _ = self.alphabeta(depth - 1, alpha, beta, False)
-                self.undoMove(move)
-                self.curr_player = original_curr_player
-                self.last_move = original_last_move
-                if eval_score > max_eval:
-                    max_eval, best_move = eval_score, move
+        for i, move in enumerate(moves):
+            self.push(move, player)
+            eval_score = self._search(depth - 1, alpha, beta, not maximizing, prune)
+            self.pop()
+            if self.stopped:
+                best_moves[ply] = None
+                return 0
+            if (eval_score > best_eval) if maximizing else (eval_score < best_eval):
+                best_eval, best_move = eval_score, move
+                pv.clear()
+                pv.append(move)
+                pv.extend(child_pv)
+            if maximizing:
                 alpha = max(alpha, eval_score)
-                if beta <= alpha:
-                    break
-            return max_eval, best_move
-        else:
-            min_eval = float('inf')
-            for move in self.generateMoves():
-                original_last_move = self.last_move
-                original_curr_player = self.curr_player
-                self.makeMove(move, self.HUMAN)
-                eval_score, _ = self.alphabeta(depth - 1, alpha, beta, True)
-                self.undoMove(move)
-                self.curr_player = original_curr_player
-                self.last_move = original_last_move
-                if eval_score < min_eval:
-                    min_eval, best_move = eval_score, move
+            else:
                 beta = min(beta, eval_score)
-                if beta <= alpha:
+            if stats is not None:
+                stats.children += 1
+            if prune and beta <= alpha:
+                self.record_cutoff(move, depth, maximizing)
+                if stats is not None:
+                    stats.cutoffs += 1
+                    if i == 0:
+                        stats.first_cutoffs += 1
+                break
+        if tt is not None and best_move is not None:
+            if best_eval <= alpha_orig:
+                flag = UPPER
+            elif best_eval >= beta_orig:
+                flag = LOWER
+            else:
+                flag = EXACT
+            tt.store(tt_key, depth, flag, best_eval, self.to_table(best_move))
+        best_moves[ply] = best_move
+        return best_eval
+
+    def pvs(self, depth, alpha, beta, maximizing, first_move=None):
+        # principal variation search, same interface and AI-side scores as alphabeta
+        self._begin()
+        if maximizing:
+            score = self._pvs(depth, alpha, beta, 1, first_move)
+        else:
+            score = -self._pvs(depth, -beta, -alpha, -1, first_move)
+        return score, self.best_moves[self.stone_count]
+
+    def _pvs(self, depth, alpha, beta, color, first_move=None):
+        # negamax: scores are from the side to move's point of view (color 1 for AI,
+        # -1 for HUMAN). the first move gets the full window, the rest are scouted
+        # with a null window and only searched again if they beat alpha. the
+        # transposition table holds AI-side scores so it can be shared with alphabeta
+        self.nodes += 1
+        if self.deadline is not None and self.nodes & 255 == 0 and time.perf_counter() > self.deadline:
+            self.stopped = True
+        ply = self.stone_count
+        best_moves = self.best_moves
+        best_moves[ply] = None
+        if self.stopped:
+            return 0
+        stats = self.stats
+        if stats is not None:
+            stats.nodes += 1
+            if depth > stats.depth:
+                stats.depth = depth
+        pv = self.pv_table[ply]
+        pv.clear()
+        if depth == 0 or self.checkWinner() != 0:
+            if stats is not None:
+                stats.leaves += 1
+            return color * self.evaluate()
+        maximizing = color == 1
+        key = self.hash ^ self.side_key if maximizing else self.hash
+        tt_move = None
+        if self.tt is not None:
+            tt_key = self.table_key(maximizing)
+            entry = self.tt.probe(tt_key)
+            if entry is not None:
+                _, entry_depth, flag, entry_score, tt_move = entry
+                tt_move = self.from_table(tt_move)
+                if entry_depth >= depth:
+                    entry_score *= color
+                    if flag == EXACT:
+                        best_moves[ply] = tt_move
+                        pv.append(tt_move)
+                        return entry_score
+                    if (flag == LOWER) == maximizing:
+                        alpha = max(alpha, entry_score)
+                    else:
+                        beta = min(beta, entry_score)
+                    if beta <= alpha:
+                        best_moves[ply] = tt_move
+                        return entry_score
+        alpha_orig = alpha
+        pv_move = self.pv_moves.get(key) if self.pv_ordering and self.tt is None else None
+        moves = self.order_moves(self.generateMoves(self.move_buffers[ply]), maximizing,
+                                 first_move, tt_move, pv_move, depth)
+        if stats is not None:
+            stats.interior += 1
+        player = self.AI if maximizing else self.HUMAN
+        child_pv = self.pv_table[ply + 1]
+        best_eval, best_move = -INF, None
+        for i, move in enumerate(moves):
+            self.push(move, player)
+            if i == 0:
+                eval_score = -self._pvs(depth - 1, -beta, -alpha, -color)
+            else:
+                eval_score = -self._pvs(depth - 1, -alpha - 1, -alpha, -color)
+                if alpha < eval_score < beta and not self.stopped:
+                    if stats is not None:
+                        stats.researches += 1
+                    eval_score = -self._pvs(depth - 1, -beta, -alpha, -color)
+            self.pop()
+            if self.stopped:
+                best_moves[ply] = None
+                return 0
+            if eval_score > best_eval:
+                best_eval, best_move = eval_score, move
+                pv.clear()
+                pv.append(move)
+                pv.extend(child_pv)
+            alpha = max(alpha, eval_score)
+            if stats is not None:
+                stats.children += 1
+            if beta <= alpha:
+                self.record_cutoff(move, depth, maximizing)
+                if stats is not None:
+                    stats.cutoffs += 1
+                    if i == 0:
+                        stats.first_cutoffs += 1
+                break
+        if self.tt is not None and best_move is not None:
+            if best_eval <= alpha_orig:
+                flag = UPPER if maximizing else LOWER
+            elif best_eval >= beta:
+                flag = LOWER if maximizing else UPPER
+            else:
+                flag = EXACT
+            self.tt.store(tt_key, depth, flag, color * best_eval, self.to_table(best_move))
+        best_moves[ply] = best_move
+        return best_eval
+
+    def aspiration(self, depth, previous, first_move=None):
+        # pvs with a window around the previous iteration's score, widened on the
+        # failing side until the score falls inside it
+        if previous is None or abs(previous) >= 10 ** 7:
+            return self.pvs(depth, -INF, INF, True, first_move)
+        low = high = self.aspiration_window
+        while True:
+            alpha = previous - low if low < 10 ** 8 else -INF
+            beta = previous + high if high < 10 ** 8 else INF
+            score, move = self.pvs(depth, alpha, beta, True, first_move)
+            if self.stopped:
+                return score, move
+            if score <= alpha:
+                low *= 10
+            elif score >= beta:
+                high *= 10
+            else:
+                return score, move
+            if self.stats is not None:
+                self.stats.researches += 1
+            first_move = move or first_move
+
+    def search(self, time_budget_ms=None, max_depth=3, algorithm="pvs"):
+        # iterative deepening over pvs with aspiration windows (or plain alphabeta
+        # with algorithm="alphabeta"); an iteration cut short by the time
+        # budget (or by cancel() from another thread) is thrown away and the last
+        # fully searched move is returned. a book move, or else a forced win by
+        # continuous fours found by the threat search, is played straight away
+        self.nodes = 0
+        self.depth_reached = 0
+        self.stopped = False
+        if self.book is not None:
+            found = self.book.lookup(self)
+            if found is not None:
+                move, score = found
+                self.search_source = "book"
+                return score, move
+        if self.threat_budget:
+            threats = ThreatSearch(self, self.threat_budget)
+            line = threats.find(self.AI)
+            self.nodes += threats.nodes
+            if line:
+                self.search_source = "threat"
+                return 10 ** 7, line[0]
+        self.deadline = time.perf_counter() + time_budget_ms / 1000 if time_budget_ms else None
+        best_score, best_move = None, None
+        if self.history_heuristic:
+            self.age_history()
+        # scores swing between odd and even depths, so the aspiration window is
+        # centred on the score from two iterations back
+        scores = [None, None]
+        self.searching = True
+        try:
+            for depth in range(1, max_depth + 1):
+                if algorithm == "alphabeta":
+                    score, move = self.alphabeta(depth, -INF, INF, True, best_move)
+                else:
+                    score, move = self.aspiration(depth, scores[-2], best_move)
+                if self.stopped:
+                    break
+                scores.append(score)
+                best_score, best_move = score, move
+                self.depth_reached = depth
+                self.remember_pv(True)
+                if self.stats is not None:
+                    self.stats.report()
+                # a forced win can't get better deeper down, only more expensive to find
+                if score >= 10 ** 7:
                     break
-            return min_eval, best_move
+        finally:
+            self.deadline = None
+            self.searching = False
+            self.stopped = False
+        self.search_source = algorithm
+        if best_move is None:
+            self.search_source = "fallback"
+            moves = self.generateMoves()
+            if moves:
+                best_move = moves[0]
+        return best_score, best_move
+
+    def enable_stats(self, callback=None):
+        from search_stats import SearchStats
+        stats = SearchStats(callback)
+        stats.attach(self)
+        return stats
+
+    def disable_stats(self):
+        if self.stats is not None:
+            self.stats.detach(self)
+
+    def cancel(self):
+        self.stopped = True
 
     def print_board(self):
         for row in self.board:
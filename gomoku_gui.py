@@ -1,9 +1,17 @@
+import queue
+import threading
+import time
 import tkinter as tk
 from tkinter import ttk, messagebox
+import game_record
+import opening_book
+from game_state import GameState
+from gameplay import gamePlay
+from ponder import Ponderer
 
 
 class GomokuGUI:
-    def __init__(self, master, game, mode, ai1_algo=None, ai2_algo=None):
+    def __init__(self, master, game, mode, ai1_algo=None, ai2_algo=None, show_stats=False, record=True):
         self.master = master
         self.game = game
         self.mode = mode
@@ -14,13 +22,40 @@ class GomokuGUI:
         self.canvas_size = self.game.width * self.cell_size
         self.stone_size = self.cell_size // 3
         self.ai_delay = 500
+        self.time_budget_ms = 5000
+        self.poll_interval = 100
+        self.search_game = None
+        self.search_thread = None
+        self.search_id = 0
+        self.search_results = queue.Queue()
+        self.thinking = False
+        self.show_stats = show_stats
+        if self.game.book is None:
+            self.game.book = opening_book.load_default(self.game.width, self.game.height)
+        # search the player's likely replies while they think
+        self.ponderer = Ponderer(self.game) if self.mode == "human_vs_ai" else None
+        self.recorder = None
+        if record:
+            self.recorder = game_record.GameRecorder(self.game.width, self.game.height, self.mode,
+                                                     *self.record_sides())
+        self.turn_started = time.perf_counter()
+        self.search_score = None
+        self.search_ms = None
+        self.search_source = None
         self.current_ai = "ai1"
         self.paused = False
+        self.closed = False
+        # canvas items by cell, so a move only touches its own stone
+        self.stone_items = {}
+        self.last_move_item = None
+        self.win_line_item = None
         self.bg_color = '#2D2D2D'
         self.light_square = '#3D3D3D'
         self.dark_square = '#2D2D2D'
         self.text_color = '#FFFFFF'
         self.master.title(self.get_window_title())
+        # the mode selector may have fixed the window's size; fit it to the board
+        self.master.geometry("")
         self.master.resizable(False, False)
         self.master.configure(bg=self.bg_color)
         self.style = ttk.Style()
@@ -42,6 +77,10 @@ class GomokuGUI:
             font=('Arial', 12, 'bold')
         )
         self.status_label.pack()
+        self.stats_label = None
+        if self.show_stats:
+            self.stats_label = ttk.Label(self.master, text="", font=('Arial', 9), wraplength=self.canvas_size)
+            self.stats_label.pack()
         control_frame = ttk.Frame(self.master)
         control_frame.pack(pady=10)
         ttk.Button(
@@ -49,6 +88,11 @@ class GomokuGUI:
             text="New Game",
             command=self.reset_game
         ).pack(side=tk.LEFT, padx=5)
+        ttk.Button(
+            control_frame,
+            text="Menu",
+            command=self.back_to_menu
+        ).pack(side=tk.LEFT, padx=5)
 
         if self.mode == "ai_vs_ai":
             self.pause_btn = ttk.Button(
@@ -72,8 +116,14 @@ class GomokuGUI:
         )
         if self.mode != "ai_vs_ai":
             self.switch_btn.pack(side=tk.LEFT, padx=5)
+        self.master.protocol("WM_DELETE_WINDOW", self.close)
 
     def switch_to_ai_vs_ai(self):
+        self.cancel_search()
+        # answers pondered for the player would be played for either AI
+        if self.ponderer is not None:
+            self.ponderer.stop()
+            self.ponderer = None
         self.ai1_algo = "alphabeta"
         self.ai2_algo = "minimax"
         if self.mode == "human_vs_human":
@@ -109,8 +159,14 @@ class GomokuGUI:
             current_algo = self.ai1_algo if self.current_ai == "ai1" else self.ai2_algo
             return f"AI ({current_algo.title()}) Turn"
 
+    def is_open(self):
+        return not self.closed and self.master.winfo_exists()
+
     def draw_board(self):
+        # the grid is drawn once; stones, the last move marker and the winning
+        # line are separate items updated in place from then on
         self.canvas.delete("all")
+        self.stone_items = {}
         for i in range(self.game.width):
             x = i * self.cell_size + self.cell_size // 2
             self.canvas.create_line(
@@ -123,25 +179,63 @@ class GomokuGUI:
                 self.cell_size // 2, y,
                 self.canvas_size - self.cell_size // 2, y
             )
+        self.last_move_item = self.canvas.create_rectangle(
+            0, 0, 0, 0, outline='#E04040', width=2, state='hidden'
+        )
+        self.win_line_item = self.canvas.create_line(
+            0, 0, 0, 0, fill='#E04040', width=4, state='hidden'
+        )
         for i in range(self.game.height):
             for j in range(self.game.width):
                 if self.game.board[i][j] != 0:
                     self.draw_stone(i, j)
+        if self.game.last_move:
+            self.mark_last_move(*self.game.last_move)
+
+    def cell_center(self, row, col):
+        return col * self.cell_size + self.cell_size // 2, row * self.cell_size + self.cell_size // 2
 
     def draw_stone(self, row, col):
-        x = col * self.cell_size + self.cell_size // 2
-        y = row * self.cell_size + self.cell_size // 2
         color = 'black' if self.game.board[row][col] == self.game.AI else 'white'
-        self.canvas.create_oval(
-            x - self.stone_size,
-            y - self.stone_size,
-            x + self.stone_size,
-            y + self.stone_size,
-            fill=color,
-            outline='black'
-        )
+        item = self.stone_items.get((row, col))
+        if item is not None:
+            self.canvas.itemconfig(item, fill=color)
+        else:
+            x, y = self.cell_center(row, col)
+            self.stone_items[(row, col)] = self.canvas.create_oval(
+                x - self.stone_size,
+                y - self.stone_size,
+                x + self.stone_size,
+                y + self.stone_size,
+                fill=color,
+                outline='black',
+                tags='stone'
+            )
+        self.mark_last_move(row, col)
+
+    def mark_last_move(self, row, col):
+        x, y = self.cell_center(row, col)
+        size = self.stone_size + 3
+        self.canvas.coords(self.last_move_item, x - size, y - size, x + size, y + size)
+        self.canvas.itemconfig(self.last_move_item, state='normal')
+        self.canvas.tag_raise(self.last_move_item)
+
+    def show_winning_line(self):
+        line = self.game.winning_line(self.game.last_move)
+        if line is None:
+            return
+        (x1, y1), (x2, y2) = (self.cell_center(*cell) for cell in line)
+        self.canvas.coords(self.win_line_item, x1, y1, x2, y2)
+        self.canvas.itemconfig(self.win_line_item, state='normal')
+        self.canvas.tag_raise(self.win_line_item)
+
+    def clear_stones(self):
+        self.canvas.delete('stone')
+        self.stone_items = {}
+        self.canvas.itemconfig(self.last_move_item, state='hidden')
+        self.canvas.itemconfig(self.win_line_item, state='hidden')
     def human_move(self, event):
-        if self.game.checkWinner() != 0 or self.paused:
+        if self.game.checkWinner() != 0 or self.paused or self.thinking:
             return
         col = (event.x - self.cell_size // 2) // self.cell_size
         row = (event.y - self.cell_size // 2) // self.cell_size
@@ -153,38 +247,124 @@ class GomokuGUI:
                 self.status_label.config(text=self.get_status_text())
             else:
                 player = self.game.HUMAN
+            self.record_move((row, col), player)
             self.game.playround((row, col), player)
             self.draw_stone(row, col)
-            self.check_game_status()
+            if self.check_game_status():
+                return
             if self.mode == "human_vs_ai":
                 self.ai_turn()
 
-    def ai_turn(self):
-        if not self.master.winfo_exists():
-            return
-        if not self.master.winfo_exists():
-            return
+    def start_search(self, algorithm, depth, on_done):
+        # the search runs on a copy of the game in a worker thread; the Tk loop
+        # polls for the result and shows progress meanwhile
+        self.cancel_search()
+        self.search_id += 1
+        search_id = self.search_id
+        if self.search_game is None:
+            self.search_game = gamePlay.from_snapshot(self.game.snapshot(), backend=self.game.backend)
+            self.search_game.book = self.game.book
+            self.search_game.tt = self.game.tt
+            if self.show_stats:
+                self.search_game.enable_stats()
+        else:
+            self.search_game.load_snapshot(self.game.snapshot())
+        game = self.search_game
+        if game.stats is not None:
+            game.stats.reset()
+        ponderer = self.ponderer if self.mode == "human_vs_ai" else None
+        state = self.game.snapshot()
 
-        if self.game.checkWinner() != 0 or self.paused:
+        def run():
+            started = time.perf_counter()
+            try:
+                # an answer pondered during the player's turn, if their move was predicted
+                found = None
+                if ponderer is not None:
+                    found = ponderer.take(state, depth, timeout=self.time_budget_ms / 1000)
+                if found is not None:
+                    score, move = found
+                    source = "ponder"
+                elif algorithm == "alphabeta":
+                    score, move = game.search(time_budget_ms=self.time_budget_ms, max_depth=depth)
+                    source = game.search_source
+                else:
+                    score, move = game.minimax(depth, True)
+                    source = "minimax"
+            except Exception as e:
+                print(f"Error during AI move: {e}")
+                score, move, source = None, None, None
+            self.search_results.put((search_id, score, move, (time.perf_counter() - started) * 1000, source))
+
+        self.thinking = True
+        self.search_started = time.perf_counter()
+        self.search_thread = threading.Thread(target=run, daemon=True)
+        self.search_thread.start()
+        self.master.after(self.poll_interval, self.poll_search, search_id, on_done)
+
+    def poll_search(self, search_id, on_done):
+        if search_id != self.search_id or not self.thinking:
+            return
+        try:
+            while True:
+                result_id, score, move, ms, source = self.search_results.get_nowait()
+                if result_id == search_id:
+                    self.thinking = False
+                    self.search_score = score
+                    self.search_ms = ms
+                    self.search_source = source
+                    if self.stats_label is not None:
+                        self.stats_label.config(text=self.search_game.stats.summary())
+                    on_done(move)
+                    return
+        except queue.Empty:
+            pass
+        except tk.TclError:
             return
         try:
             if self.status_label.winfo_exists():
-                self.status_label.config(text="AI is thinking...")
-                self.master.update()
+                elapsed = time.perf_counter() - self.search_started
+                self.status_label.config(
+                    text=f"{self.thinking_text} depth {self.search_game.depth_reached}, "
+                         f"{self.search_game.nodes} nodes, {elapsed:.1f}s"
+                )
+            self.master.after(self.poll_interval, self.poll_search, search_id, on_done)
         except tk.TclError:
             return
 
+    def cancel_search(self):
+        if self.search_thread is not None and self.search_thread.is_alive():
+            # the old thread may take a moment to unwind, so it keeps its game
+            # and the next search gets a fresh one
+            self.search_game.cancel()
+            self.search_game = None
+        self.search_id += 1
+        self.thinking = False
+
+    def ai_turn(self):
+        if not self.is_open():
+            return
+
+        if self.game.checkWinner() != 0 or self.paused:
+            return
         try:
-            _, best_move = self.game.alphabeta(3, -float('inf'), float('inf'), True)
-        except Exception as e:
-            print(f"Error during AI move: {e}")
+            if self.status_label.winfo_exists():
+                self.thinking_text = "AI is thinking..."
+                self.status_label.config(text=self.thinking_text)
+        except tk.TclError:
             return
+        self.start_search("alphabeta", 3, self.finish_ai_turn)
 
+    def finish_ai_turn(self, best_move):
         if best_move:
             row, col = best_move
+            self.record_move(best_move, self.game.AI, self.search_score, self.search_ms, self.search_source)
             self.game.playround(best_move, self.game.AI)
             self.draw_stone(row, col)
-            self.check_game_status()
+            if self.check_game_status():
+                return
+            if self.ponderer is not None:
+                self.ponderer.start()
             try:
                 if (self.game.checkWinner() == 0 and
                         not self.paused and
@@ -194,9 +374,9 @@ class GomokuGUI:
                 pass
 
     def ai_vs_ai_turn(self):
-        if not self.master.winfo_exists() or self.paused or self.game.checkWinner() != 0:
+        if not self.is_open() or self.paused or self.game.checkWinner() != 0:
             return
-        if self.paused or self.game.checkWinner() != 0:
+        if self.thinking:
             return
         if self.current_ai == "ai1":
             algorithm = self.ai1_algo
@@ -207,32 +387,66 @@ class GomokuGUI:
             player = self.game.HUMAN
             next_ai = "ai1"
 
-        self.status_label.config(text=f"AI ({algorithm.title()}) is thinking...")
-        self.master.update()
-
-        if algorithm == "alphabeta":
-            _, best_move = self.game.alphabeta(2, -float('inf'), float('inf'), True)
-        else:
-            _, best_move = self.game.minimax(2, True)
+        self.thinking_text = f"AI ({algorithm.title()}) is thinking..."
+        self.status_label.config(text=self.thinking_text)
+        self.start_search(algorithm, 2,
+                          lambda best_move: self.finish_ai_vs_ai_turn(best_move, player, next_ai))
 
+    def finish_ai_vs_ai_turn(self, best_move, player, next_ai):
         if best_move:
             row, col = best_move
+            self.record_move(best_move, player, self.search_score, self.search_ms, self.search_source)
             self.game.playround(best_move, player)
             self.draw_stone(row, col)
             self.current_ai = next_ai
-            self.check_game_status()
-        if self.master.winfo_exists():
+            if self.check_game_status():
+                return
+        if self.is_open():
             self.master.after(self.ai_delay, self.ai_vs_ai_turn)
 
+    def record_sides(self):
+        if self.mode == "ai_vs_ai":
+            return game_record.side(self.ai1_algo, 2), game_record.side(self.ai2_algo, 2)
+        if self.mode == "human_vs_ai":
+            return game_record.side(self.ai1_algo, 3), game_record.side("human")
+        return game_record.side("human"), game_record.side("human")
+
+    def record_move(self, move, player, score=None, ms=None, source=None):
+        # a human move is timed from the previous move, an AI move by its search
+        now = time.perf_counter()
+        if self.recorder is not None:
+            if ms is None:
+                ms = (now - self.turn_started) * 1000
+            self.recorder.add(move, player, ms, score, source)
+        self.turn_started = now
+
+    def save_record(self):
+        if self.recorder is None:
+            return
+        winner = self.game.checkWinner()
+        if winner:
+            self.recorder.finish(winner, "win")
+        elif self.board_full():
+            self.recorder.finish(0, "draw")
+        else:
+            self.recorder.finish(0, "abandoned")
+
     def toggle_pause(self):
         self.paused = not self.paused
         self.pause_btn.config(text="Resume" if self.paused else "Pause")
-        if not self.paused and self.mode == "ai_vs_ai":
+        if self.paused:
+            self.cancel_search()
+            self.status_label.config(text="Paused")
+        elif self.mode == "ai_vs_ai":
             self.ai_vs_ai_turn()
 
+    def board_full(self):
+        return self.game.stone_count == self.game.width * self.game.height
+
     def check_game_status(self):
-        if not self.master.winfo_exists():
-            return
+        # True when the game ended; it has been reset by the time this returns
+        if not self.is_open():
+            return True
         winner = self.game.checkWinner()
         try:
             if winner != 0:
@@ -241,20 +455,59 @@ class GomokuGUI:
                     self.game.HUMAN: f"AI ({self.ai2_algo.title()})" if self.mode == "ai_vs_ai" else "Player"
                 }.get(winner, "Unknown")
 
-                if self.master.winfo_exists():
-                    messagebox.showinfo("Game Over", f"{winner_text} Wins!")
-                    self.reset_game()
-            elif all(cell != 0 for row in self.game.board for cell in row):
-                if self.master.winfo_exists():
-                    messagebox.showinfo("Game Over", "It's a Tie!")
-                    self.reset_game()
+                self.show_winning_line()
+                messagebox.showinfo("Game Over", f"{winner_text} Wins!")
+                self.reset_game()
+                return True
+            elif self.board_full():
+                messagebox.showinfo("Game Over", "It's a Tie!")
+                self.reset_game()
+                return True
         except tk.TclError:
-            return
+            return True
+        return False
+
+    def stop_game(self):
+        self.cancel_search()
+        if self.ponderer is not None:
+            self.ponderer.stop()
+        self.save_record()
 
     def reset_game(self):
-        if self.master.winfo_exists():
-            self.master.destroy()
+        # a new game with the same settings on the same window; the search game
+        # and its transposition table are kept
+        self.stop_game()
+        if not self.is_open():
+            return
+        self.game.load_snapshot(GameState(self.game.width, self.game.height))
+        self.clear_stones()
+        self.current_ai = "ai1"
+        if self.paused:
+            self.paused = False
+            self.pause_btn.config(text="Pause")
+        if self.recorder is not None:
+            # the mode may have been switched to AI vs AI during the last game
+            black, white = self.record_sides()
+            self.recorder.header.update(mode=self.mode, black=black, white=white)
+        self.status_label.config(text=self.get_status_text())
+        if self.mode == "human_vs_ai":
+            self.ai_turn()
+        elif self.mode == "ai_vs_ai":
+            self.master.after(self.ai_delay, self.ai_vs_ai_turn)
+
+    def close(self):
+        # closing the window saves the game in progress
+        self.stop_game()
+        self.closed = True
+        self.master.destroy()
+
+    def back_to_menu(self):
+        self.stop_game()
+        self.closed = True
+        if not self.master.winfo_exists():
+            return
+        self.master.protocol("WM_DELETE_WINDOW", self.master.destroy)
+        for child in self.master.winfo_children():
+            child.destroy()
         from mode_selector import ModeSelector
-        root = tk.Tk()
-        ModeSelector(root)
-        root.mainloop()
+        ModeSelector(self.master)
@@ -9,7 +9,7 @@ class ModeSelector(ttk.Frame):
         super().__init__(master)
         self.master = master
         self.master.title("Gomoku - Brilliant Settings")
-        self.master.geometry("500x450")
+        self.master.geometry("500x490")
         self.master.configure(bg='#1a1a1a')
         self.pack(expand=True, fill=tk.BOTH)
         self._apply_styles()
@@ -25,6 +25,7 @@ class ModeSelector(ttk.Frame):
         style.configure('TCombobox', fieldbackground='#2e2e4f', background='#2e2e4f', foreground='#FFFFFF', arrowcolor='#FFFFFF')
         style.configure('TRadiobutton', background='#1a1a1a', foreground='#FF9CDA', font=('Helvetica', 11))
         style.map('TRadiobutton', background=[('selected','#2e2e4f')])
+        style.configure('TCheckbutton', background='#1a1a1a', foreground='#E0E0E0', font=('Helvetica', 11))
 
     def create_widgets(self):
         frame = ttk.Frame(self, padding=20)
@@ -64,6 +65,11 @@ class ModeSelector(ttk.Frame):
             ttk.Radiobutton(
                 frame, text=text, variable=self.interface_var, value=val
             ).pack(anchor=tk.W)
+        # nodes, cutoffs, branching factor and time per hot function after each AI move
+        self.stats_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            frame, text="Show search stats", variable=self.stats_var
+        ).pack(anchor=tk.W, pady=(10,0))
         ttk.Button(
             frame, text="Start Game", command=self.start_game
         ).pack(pady=20, ipadx=10)
@@ -82,15 +88,16 @@ class ModeSelector(ttk.Frame):
         game_mode = self.mode_var.get()
         ai1_algo = self.ai1_var.get() if game_mode == "ai_vs_ai" else None
         ai2_algo = self.ai2_var.get() if game_mode == "ai_vs_ai" else None
-        self.master.destroy()
+        show_stats = self.stats_var.get()
         game = gamePlay(size, size)
         if game_mode == "human_vs_human":
             game.curr_player = game.AI
         if interface == "gui":
-            root = tk.Tk()
-            GomokuGUI(root, game, game_mode, ai1_algo, ai2_algo)
-            root.mainloop()
+            # the game takes over this window, under the mainloop already running
+            self.destroy()
+            GomokuGUI(self.master, game, game_mode, ai1_algo, ai2_algo, show_stats=show_stats)
         else:
-            Console(game, game_mode, ai1_algo, ai2_algo).run()
+            self.master.destroy()
+            Console(game, game_mode, ai1_algo, ai2_algo, show_stats=show_stats).run()
 
 
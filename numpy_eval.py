@@ -0,0 +1,108 @@
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from patterns import AI_WEIGHTS, HUMAN_WEIGHTS
+
+OFF_BOARD = 3
+PAD = 5
+
+
+def available():
+    return np is not None
+
+
+def padded(rows, height, width):
+    array = np.full((height + 2 * PAD, width + 2 * PAD), OFF_BOARD, dtype=np.int8)
+    array[PAD:PAD + height, PAD:PAD + width] = np.asarray(rows, dtype=np.int8)
+    return array
+
+
+def run_table(ai_weights, human_weights):
+    # score of the run that starts at cell 0 of a 6 cell window (cells -1..4 along a
+    # direction, two bits per cell), AI minus HUMAN. a run only scores at its first
+    # stone, so summing the table over every cell and direction counts each run once
+    table = np.zeros(4 ** 6, dtype=np.int64)
+    for key in range(4 ** 6):
+        cells = [(key >> (2 * i)) & 3 for i in range(6)]
+        before, run = cells[0], cells[1:]
+        for player, weights, sign in ((1, ai_weights, 1), (2, human_weights, -1)):
+            if run[0] != player or before == player:
+                continue
+            count = 1
+            while count < 5 and run[count] == player:
+                count += 1
+            if count == 5:
+                continue
+            open_ends = (before == 0) + (run[count] == 0)
+            table[key] += sign * weights.get((count, open_ends), 0)
+    return table
+
+
+RUN_TABLE = run_table(AI_WEIGHTS, HUMAN_WEIGHTS) if np is not None else None
+
+
+def score_boards(boards, height, width, table=None):
+    # boards: (..., height + 2 * PAD, width + 2 * PAD) int8 with off-board cells set
+    # to OFF_BOARD; returns AI score minus HUMAN score for each board, matching
+    # gamePlay.evaluate_full without the winner check
+    table = RUN_TABLE if table is None else table
+    totals = np.zeros(boards.shape[:-2], dtype=np.int64)
+    for dx, dy in ((1, 0), (1, 1), (1, -1), (0, 1)):
+        key = np.zeros(boards.shape[:-2] + (height, width), dtype=np.int16)
+        for i, step in enumerate(range(-1, 5)):
+            top = PAD + step * dx
+            left = PAD + step * dy
+            key |= boards[..., top:top + height, left:left + width].astype(np.int16) << (2 * i)
+        totals += table[key].sum(axis=(-2, -1))
+    return totals
+
+
+class NumpyEvaluator:
+    # keeps an int8 copy of a game's board (updated by gamePlay.setCell) and
+    # scores whole boards, or a batch of child positions, in one vectorized pass
+    def __init__(self, game):
+        if np is None:
+            raise ImportError("The numpy evaluator needs numpy installed")
+        self.game = game
+        self.height = game.height
+        self.width = game.width
+        self.array = padded([list(row) for row in game.board], game.height, game.width)
+        patterns = game.patterns
+        if patterns.ai_weights == AI_WEIGHTS and patterns.human_weights == HUMAN_WEIGHTS:
+            self.table = RUN_TABLE
+        else:
+            self.table = run_table(patterns.ai_weights, patterns.human_weights)
+
+    def set(self, x, y, value):
+        self.array[PAD + x, PAD + y] = value
+
+    def evaluate(self):
+        game = self.game
+        winner = game.checkWinner()
+        if winner == game.AI:
+            return 10 ** 7
+        elif winner == game.HUMAN:
+            return -10 ** 7
+        return int(score_boards(self.array, self.height, self.width, self.table))
+
+    def evaluate_children(self, moves, player):
+        # evaluation after each of `moves` is played by `player`, in one batch
+        if not moves:
+            return []
+        game = self.game
+        batch = np.repeat(self.array[None], len(moves), axis=0)
+        xs = np.array([x for x, _ in moves]) + PAD
+        ys = np.array([y for _, y in moves]) + PAD
+        batch[np.arange(len(moves)), xs, ys] = player
+        scores = score_boards(batch, self.height, self.width, self.table).tolist()
+        win = 10 ** 7 if player == game.AI else -10 ** 7
+        return [win if game.is_winning_move(move, player) else score
+                for move, score in zip(moves, scores)]
+
+    def order_moves(self, moves, player):
+        scores = self.evaluate_children(moves, player)
+        sign = -1 if player == self.game.AI else 1
+        ranked = sorted(range(len(moves)), key=lambda i: sign * scores[i])
+        return [moves[i] for i in ranked]
@@ -0,0 +1,171 @@
+import argparse
+import mmap
+import os
+import struct
+import sys
+import time
+from bisect import bisect_left
+
+import symmetry
+from gameplay import gamePlay
+
+MAGIC = b"GMKBOOK1"
+# magic, width, height, entry count
+HEADER = struct.Struct("<8sHHI")
+# canonical key of the position (AI to move), best move on the canonical board, score
+ENTRY = struct.Struct("<QBBi")
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "opening_book.bin")
+
+
+class _Keys:
+    # the entries' keys as a sequence, so bisect can search the mapped file directly
+    def __init__(self, data, count):
+        self.data = data
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        return struct.unpack_from("<Q", self.data, HEADER.size + index * ENTRY.size)[0]
+
+
+class OpeningBook:
+    # best moves for positions with the AI to move, looked up by the symmetry
+    # canonical zobrist key, so one entry covers all 8 orientations. the file is a
+    # header and fixed-size entries sorted by key, mapped into memory and binary
+    # searched, so opening one costs nothing up front
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.width, self.height, count = HEADER.unpack_from(self.data)
+        if magic != MAGIC:
+            self.data.close()
+            raise ValueError(f"Not an opening book: {path}")
+        self.keys = _Keys(self.data, count)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def close(self):
+        self.data.close()
+
+    def probe(self, keys):
+        # keys: the position's zobrist key per symmetry. returns (move, score) in
+        # the position's own orientation, or None
+        key, sym = symmetry.canonical(keys)
+        index = bisect_left(self.keys, key)
+        if index == len(self.keys) or self.keys[index] != key:
+            return None
+        _, x, y, score = ENTRY.unpack_from(self.data, HEADER.size + index * ENTRY.size)
+        return symmetry.untransform((x, y), sym, self.width, self.height), score
+
+    def lookup(self, game):
+        # the book move for a gamePlay with the AI to move, if it is legal there
+        if (game.width, game.height) != (self.width, self.height) or game.curr_player != game.AI:
+            return None
+        found = self.probe(game.symmetry_keys())
+        if found is None:
+            return None
+        move, score = found
+        if game.board[move[0]][move[1]] != 0:
+            return None
+        return move, score
+
+    @staticmethod
+    def write(path, width, height, entries):
+        # entries: {canonical key: (canonical move, score)}
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, width, height, len(entries)))
+            for key in sorted(entries):
+                (x, y), score = entries[key]
+                f.write(ENTRY.pack(key, x, y, max(-2 ** 31, min(2 ** 31 - 1, score))))
+
+
+def load_default(width, height, path=DEFAULT_PATH):
+    # the shipped book if there is one for this board size, else None
+    if not os.path.exists(path):
+        return None
+    book = OpeningBook(path)
+    if (book.width, book.height) != (width, height):
+        book.close()
+        return None
+    return book
+
+
+def generate(size, plies, depth, replies, first_moves, log=None):
+    # walk the opening tree: wherever the AI is to move, store the move a deep
+    # search picks and play it; wherever the opponent is, try its `replies` best
+    # candidates. the AI either opens in the centre or answers one of the
+    # `first_moves` cells nearest to it
+    entries = {}
+    game = gamePlay(size, size)
+    game.threat_budget = 0
+
+    def expand(ai_moves_left):
+        keys = symmetry.symmetry_keys(game.flat, size, size)
+        key, sym = symmetry.canonical(keys)
+        if key in entries:
+            move = symmetry.untransform(entries[key][0], sym, size, size)
+        elif game.stone_count == 0:
+            # every empty cell scores the same, so search would pick one at random
+            move = (size // 2, size // 2)
+            entries[key] = (move, 0)
+        else:
+            start = time.perf_counter()
+            score, move = game.search(max_depth=depth)
+            if move is None:
+                return
+            entries[key] = (symmetry.transform(move, sym, size, size), score)
+            if log:
+                log(f"{len(entries)} positions, {game.stone_count} stones: {move} "
+                    f"score {score} in {time.perf_counter() - start:.1f}s")
+        if ai_moves_left <= 1:
+            return
+        game.push(move, game.AI)
+        if game.checkWinner() == 0:
+            for reply in game.generateMoves()[:replies]:
+                game.push(reply, game.HUMAN)
+                if game.checkWinner() == 0:
+                    expand(ai_moves_left - 1)
+                game.pop()
+        game.pop()
+
+    expand(plies)
+    centre = size // 2
+    near = sorted(((x, y) for x in range(size) for y in range(size)),
+                  key=lambda cell: (abs(cell[0] - centre) + abs(cell[1] - centre), cell))
+    seen = set()
+    for cell in near:
+        if len(seen) == first_moves:
+            break
+        game.push(cell, game.HUMAN)
+        key, _ = symmetry.canonical(symmetry.symmetry_keys(game.flat, size, size))
+        if key not in seen:
+            seen.add(key)
+            expand(plies)
+        game.pop()
+    return entries
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build an opening book by searching the opening tree")
+    parser.add_argument("--size", type=int, default=15)
+    parser.add_argument("--plies", type=int, default=3, help="AI moves per line")
+    parser.add_argument("--depth", type=int, default=4, help="search depth for each book move")
+    parser.add_argument("--replies", type=int, default=3, help="opponent moves tried per position")
+    parser.add_argument("--first-moves", type=int, default=3,
+                        help="distinct opponent first moves (up to symmetry) answered")
+    parser.add_argument("--output", default=DEFAULT_PATH)
+    args = parser.parse_args(argv)
+
+    entries = generate(args.size, args.plies, args.depth, args.replies, args.first_moves,
+                       log=lambda line: print(line, file=sys.stderr))
+    OpeningBook.write(args.output, args.size, args.size, entries)
+    print(f"Wrote {len(entries)} positions to {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
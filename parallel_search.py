@@ -0,0 +1,83 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from gameplay import gamePlay
+
+# one game per board size in each worker process, so its tables are built once.
+# it has no transposition table and its move ordering is cleared for every root
+# move, so a child's score never depends on which searches the worker ran before
+_worker_games = {}
+
+
+def _worker_game(state, backend):
+    game = _worker_games.get((state.width, state.height, backend))
+    if game is None:
+        game = gamePlay.from_snapshot(state, backend=backend, tt_size=0)
+        _worker_games[(state.width, state.height, backend)] = game
+    else:
+        game.load_snapshot(state)
+        game.clear_ordering()
+    return game
+
+
+def search_root_move(state, backend, move, depth, alpha):
+    game = _worker_game(state, backend)
+    game.nodes = 0
+    game.makeMove(move, game.AI)
+    score, _ = game.alphabeta(depth - 1, alpha, float('inf'), False)
+    return score, game.nodes
+
+
+class ParallelSearch:
+    # splits the root moves of alphabeta across a process pool.
+    # the first (best ordered) root move is searched on its own to get an alpha
+    # bound, then the remaining moves go out in waves of `workers` moves, each
+    # wave searched with the best score of everything before it. every child
+    # result only depends on the position and that bound, so the chosen move
+    # is the same for a fixed depth whatever order the workers finish in.
+    # nothing plays through it: the GUI, Console and engines need search()'s time
+    # budget, cancel(), book and threat search, and the batch tools already run
+    # one game per worker. clearing the ordering per root move costs about 3x the
+    # serial nodes at depth 4 (see benchmarks/parallel_speedup.py), so it only
+    # pays off with well over 3 cores
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        self.nodes = 0
+
+    def search(self, game, depth):
+        self.nodes = 0
+        moves = game.generateMoves()
+        if depth <= 1 or len(moves) <= 1:
+            game.nodes = 0
+            score, move = game.alphabeta(depth, -float('inf'), float('inf'), True)
+            self.nodes = game.nodes
+            return score, move
+
+        snapshot = game.snapshot()
+        best_move = moves[0]
+        game.nodes = 0
+        game.makeMove(best_move, game.AI)
+        best_score, _ = game.alphabeta(depth - 1, -float('inf'), float('inf'), False)
+        game.load_snapshot(snapshot)
+        self.nodes += game.nodes
+        rest = moves[1:]
+        for start in range(0, len(rest), self.workers):
+            wave = rest[start:start + self.workers]
+            futures = [self.executor.submit(search_root_move, snapshot, game.backend, move, depth, best_score)
+                       for move in wave]
+            results = [future.result() for future in futures]
+            for move, (score, nodes) in zip(wave, results):
+                self.nodes += nodes
+                if score > best_score:
+                    best_score, best_move = score, move
+        return best_score, best_move
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,189 @@
+import json
+
+EMPTY = 0
+AI = 1
+HUMAN = 2
+OFF_BOARD = 3
+
+AI_WEIGHTS = {
+    (4, 2): 10 ** 6,
+    (4, 1): 10 ** 5,
+    (3, 2): 10 ** 4,
+    (3, 1): 10 ** 3,
+    (2, 2): 10 ** 2,
+    (2, 1): 10,
+}
+
+HUMAN_WEIGHTS = {
+    (4, 2): 10 ** 7,
+    (4, 1): 10 ** 6,
+    (3, 2): 10 ** 5,
+    (3, 1): 10 ** 4,
+    (2, 2): 10 ** 3,
+    (2, 1): 10 ** 2,
+}
+
+# (own stones, at least this many empty cells, score) for a 9-cell window, first match wins
+WINDOW_RULES = ((4, 1, 1000), (3, 2, 100), (2, 3, 10))
+
+AI_WIN_BONUS = 1000000
+HUMAN_WIN_BONUS = 500000
+
+# candidate table entries pack the window score in the low 20 bits and one count
+# per winning direction above it, so the four directions of a cell can simply be added
+SCORE_MASK = (1 << 20) - 1
+AI_WIN_FLAG = 1 << 20
+HUMAN_WIN_FLAG = 1 << 24
+AI_WIN_MASK = 0xF << 20
+HUMAN_WIN_MASK = 0xF << 24
+
+# window keys: the 8 cells at -4..-1 and +1..+4 around a candidate, two bits each
+WINDOW_OFFSETS = (-4, -3, -2, -1, 1, 2, 3, 4)
+
+
+def window_shift(offset):
+    return 2 * WINDOW_OFFSETS.index(offset)
+
+
+class PatternTable:
+    # every scoring rule the engine uses, precomputed into lookup tables:
+    #  - candidate_table[key]: score_candidate's contribution of one direction, for
+    #    the 8 cells around an empty candidate encoded as a base-4 key
+    #    (empty/AI/HUMAN/off-board)
+    #  - line_score(key, length): evaluate's AI minus HUMAN run score of a whole
+    #    row, column or diagonal, memoised by its base-4 key
+    # retuned weights are plugged in through the constructor or a JSON file,
+    # the search code only ever sees the tables
+    def __init__(self, window_rules=WINDOW_RULES, ai_win_bonus=AI_WIN_BONUS,
+                 human_win_bonus=HUMAN_WIN_BONUS, ai_weights=None, human_weights=None):
+        self.window_rules = tuple(tuple(rule) for rule in window_rules)
+        self.ai_win_bonus = ai_win_bonus
+        self.human_win_bonus = human_win_bonus
+        self.ai_weights = dict(AI_WEIGHTS if ai_weights is None else ai_weights)
+        self.human_weights = dict(HUMAN_WEIGHTS if human_weights is None else human_weights)
+        self.window_scores = [[self._window_score(own, empty) for empty in range(10)]
+                              for own in range(10)]
+        if 8 * max(max(row) for row in self.window_scores) > SCORE_MASK:
+            raise ValueError("Window scores too large for the candidate table")
+        self._build_candidate_table()
+        self.line_memo = {}
+
+    def _window_score(self, own, empty):
+        for rule_own, min_empty, score in self.window_rules:
+            if own == rule_own:
+                return score if empty >= min_empty else 0
+        return 0
+
+    def _build_candidate_table(self):
+        scores = self.window_scores
+        table = [0] * (4 ** 8)
+        # stones of each player among the 8 cells of a window key, for threat detection
+        ai_counts = bytearray(4 ** 8)
+        human_counts = bytearray(4 ** 8)
+        for key in range(4 ** 8):
+            cells = [(key >> (2 * i)) & 3 for i in range(8)]
+            empty = 1 + cells.count(EMPTY)
+            ai_counts[key] = cells.count(AI)
+            human_counts[key] = cells.count(HUMAN)
+            entry = scores[ai_counts[key]][empty] + scores[human_counts[key]][empty]
+            for player, flag in ((AI, AI_WIN_FLAG), (HUMAN, HUMAN_WIN_FLAG)):
+                run = 0
+                for i in (3, 2, 1, 0):
+                    if cells[i] != player:
+                        break
+                    run += 1
+                for i in (4, 5, 6, 7):
+                    if cells[i] != player:
+                        break
+                    run += 1
+                if run >= 4:
+                    entry += flag
+            table[key] = entry
+        self.candidate_table = table
+        self.stone_counts = (None, bytes(ai_counts), bytes(human_counts))
+
+    def candidate_score(self, total):
+        # total: sum of candidate_table entries over the four directions
+        score = total & SCORE_MASK
+        if total & AI_WIN_MASK:
+            score += self.ai_win_bonus
+        if total & HUMAN_WIN_MASK:
+            score += self.human_win_bonus
+        return score
+
+    def line_score(self, key, length):
+        memo_key = key << 5 | length
+        score = self.line_memo.get(memo_key)
+        if score is None:
+            if len(self.line_memo) > 1 << 20:
+                self.line_memo.clear()
+            cells = [(key >> (2 * i)) & 3 for i in range(length)]
+            score = (self._runs_score(cells, AI, self.ai_weights) -
+                     self._runs_score(cells, HUMAN, self.human_weights))
+            self.line_memo[memo_key] = score
+        return score
+
+    @staticmethod
+    def _runs_score(cells, player, weights):
+        total = 0
+        count = 0
+        open_before = 0
+        prev_empty = 0
+        for cell in cells:
+            if cell == player:
+                if count == 0:
+                    open_before = prev_empty
+                count += 1
+                prev_empty = 0
+            else:
+                if count:
+                    if count < 5:
+                        total += weights.get((count, open_before + (cell == EMPTY)), 0)
+                    count = 0
+                prev_empty = 1 if cell == EMPTY else 0
+        if count and count < 5:
+            total += weights.get((count, open_before), 0)
+        return total
+
+    def to_json(self):
+        return {
+            "window_rules": [list(rule) for rule in self.window_rules],
+            "ai_win_bonus": self.ai_win_bonus,
+            "human_win_bonus": self.human_win_bonus,
+            "ai_weights": [[count, open_ends, weight]
+                           for (count, open_ends), weight in sorted(self.ai_weights.items())],
+            "human_weights": [[count, open_ends, weight]
+                              for (count, open_ends), weight in sorted(self.human_weights.items())],
+        }
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(
+            window_rules=data.get("window_rules", WINDOW_RULES),
+            ai_win_bonus=data.get("ai_win_bonus", AI_WIN_BONUS),
+            human_win_bonus=data.get("human_win_bonus", HUMAN_WIN_BONUS),
+            ai_weights={(count, open_ends): weight
+                        for count, open_ends, weight in data.get("ai_weights", [])} or None,
+            human_weights={(count, open_ends): weight
+                           for count, open_ends, weight in data.get("human_weights", [])} or None,
+        )
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_json(), f, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls.from_json(json.load(f))
+
+
+_default = None
+
+
+def default_table():
+    # built once per process on first use
+    global _default
+    if _default is None:
+        _default = PatternTable()
+    return _default
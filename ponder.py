@@ -0,0 +1,98 @@
+import threading
+import time
+
+from gameplay import gamePlay
+
+
+class Ponderer:
+    # searches on the opponent's time: after the AI moves, start() plays the
+    # opponent's most likely replies on a copy of the game in a background thread
+    # and searches the AI's answer to each, first to `depth` and then one ply
+    # deeper. results are kept per position (a GameState) and the copy shares the
+    # game's transposition table, so even a reply that wasn't predicted starts
+    # with a warm table. take() collects the answer for the position actually
+    # reached, waiting for the search of it if that one is still running
+    def __init__(self, game, replies=3, depth=3, extra_depth=1):
+        self.game = game
+        self.replies = replies
+        self.depth = depth
+        self.extra_depth = extra_depth
+        self.ponder_game = None
+        self.thread = None
+        self.stopping = False
+        self.cond = threading.Condition()
+        self.results = {}
+        self.current = None
+
+    def start(self):
+        # call with the opponent to move
+        self.stop()
+        game = self.game
+        if game.checkWinner() != 0:
+            return
+        if self.ponder_game is None:
+            self.ponder_game = gamePlay.from_snapshot(game.snapshot(), backend=game.backend, tt_size=0)
+        else:
+            self.ponder_game.load_snapshot(game.snapshot())
+        self.ponder_game.tt = game.tt
+        self.ponder_game.book = game.book
+        replies = self.ponder_game.generateMoves()[:self.replies]
+        self.results = {}
+        self.stopping = False
+        self.thread = threading.Thread(target=self._run, args=(self.ponder_game, replies), daemon=True)
+        self.thread.start()
+
+    def _run(self, game, replies):
+        for depth in (self.depth, self.depth + self.extra_depth):
+            for reply in replies:
+                if self.stopping:
+                    return
+                game.push(reply, game.HUMAN)
+                if game.checkWinner() == 0:
+                    state = game.snapshot()
+                    with self.cond:
+                        self.current = (state, depth)
+                    score, move = game.search(max_depth=depth)
+                    # only iterated answers are kept: a cancelled search's fallback
+                    # move, and book or threat answers, leave depth_reached at 0
+                    reached = game.depth_reached
+                    with self.cond:
+                        if move is not None and score is not None and reached:
+                            self.results[state] = (reached, score, move)
+                        self.current = None
+                        self.cond.notify_all()
+                game.pop()
+
+    def stop(self):
+        self.stopping = True
+        if self.ponder_game is not None:
+            self.ponder_game.cancel()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        with self.cond:
+            self.current = None
+            self.cond.notify_all()
+
+    def take(self, state, depth, timeout=None):
+        # (score, move) for `state` searched to at least `depth`, else None; waits up
+        # to `timeout` seconds if that search is in progress. pondering stops either way
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self.cond:
+            while True:
+                found = self.results.get(state)
+                if found is not None and found[0] >= depth:
+                    break
+                current = self.current
+                if current is None or current[0] != state or current[1] < depth:
+                    break
+                remaining = deadline - time.monotonic() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    break
+                self.cond.wait(remaining)
+        self.stop()
+        found = self.results.get(state)
+        if found is None:
+            return None
+        _, score, move = found
+        return score, move
@@ -0,0 +1,88 @@
+import time
+
+
+class SearchStats:
+    # opt-in counters for a gamePlay search. the node counters are bumped by
+    # minimax/alphabeta/pvs only when game.stats is set, and the hot functions are
+    # wrapped with timers on the instance only while attached, so a game without
+    # stats pays a single attribute check per node. times are inclusive
+    # (generateMoves includes the score_candidates call it makes).
+    HOT_FUNCTIONS = ("generateMoves", "score_candidates", "is_winning_move",
+                     "evaluate", "setCell")
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.times = {}
+        self.calls = {}
+        self.reset()
+
+    def reset(self):
+        self.nodes = 0
+        self.leaves = 0
+        self.interior = 0
+        self.children = 0
+        self.cutoffs = 0
+        self.first_cutoffs = 0
+        # pvs null-window fail-highs and aspiration window failures searched again
+        self.researches = 0
+        self.depth = 0
+        # cleared in place, the timing wrappers hold on to these dicts
+        for name in self.HOT_FUNCTIONS:
+            self.times[name] = 0.0
+            self.calls[name] = 0
+        self.started = time.perf_counter()
+
+    def attach(self, game):
+        for name in self.HOT_FUNCTIONS:
+            setattr(game, name, self._timed(name, getattr(type(game), name).__get__(game)))
+        game.stats = self
+
+    def detach(self, game):
+        for name in self.HOT_FUNCTIONS:
+            game.__dict__.pop(name, None)
+        game.stats = None
+
+    def _timed(self, name, func):
+        times = self.times
+        calls = self.calls
+        clock = time.perf_counter
+
+        def timed(*args):
+            start = clock()
+            try:
+                return func(*args)
+            finally:
+                times[name] += clock() - start
+                calls[name] += 1
+        return timed
+
+    def snapshot(self):
+        elapsed = time.perf_counter() - self.started
+        return {
+            "nodes": self.nodes,
+            "leaves": self.leaves,
+            "cutoffs": self.cutoffs,
+            # share of cutoffs caused by the first move searched, i.e. move ordering quality
+            "first_move_cutoff_rate": self.first_cutoffs / self.cutoffs if self.cutoffs else 0.0,
+            "researches": self.researches,
+            "depth": self.depth,
+            "branching_factor": self.children / self.interior if self.interior else 0.0,
+            "effective_branching_factor": self.nodes ** (1 / self.depth) if self.depth else 0.0,
+            "elapsed": elapsed,
+            "nodes_per_sec": self.nodes / elapsed if elapsed > 0 else 0.0,
+            "times": dict(self.times),
+            "calls": dict(self.calls),
+        }
+
+    def report(self):
+        if self.callback is not None:
+            self.callback(self.snapshot())
+
+    def summary(self):
+        stats = self.snapshot()
+        hot = ", ".join(f"{name} {stats['times'][name] * 1000:.0f}ms"
+                        for name in self.HOT_FUNCTIONS if stats["calls"][name])
+        return (f"{stats['nodes']} nodes ({stats['leaves']} leaves, {stats['cutoffs']} cutoffs, "
+                f"{stats['first_move_cutoff_rate']:.0%} on the first move), "
+                f"depth {stats['depth']}, branching {stats['branching_factor']:.1f}, "
+                f"{stats['nodes_per_sec']:.0f} nodes/s; {hot}")
@@ -0,0 +1,62 @@
+from game_state import zobrist_table
+
+# the 8 rotations and reflections of a board, as (x, y) -> cell on an n x n board:
+# identity, rotations by 90/180/270 degrees, then the four mirror images
+TRANSFORMS = (
+    lambda x, y, n: (x, y),
+    lambda x, y, n: (y, n - 1 - x),
+    lambda x, y, n: (n - 1 - x, n - 1 - y),
+    lambda x, y, n: (n - 1 - y, x),
+    lambda x, y, n: (x, n - 1 - y),
+    lambda x, y, n: (n - 1 - x, y),
+    lambda x, y, n: (y, x),
+    lambda x, y, n: (n - 1 - y, n - 1 - x),
+)
+INVERSE = (0, 3, 2, 1, 4, 5, 6, 7)
+# the ones that keep a non-square board's shape
+RECTANGLE_SYMMETRIES = (0, 2, 4, 5)
+
+
+def symmetries(width, height):
+    return range(8) if width == height else RECTANGLE_SYMMETRIES
+
+
+def transform(move, symmetry, width, height):
+    x, y = move
+    if width == height:
+        return TRANSFORMS[symmetry](x, y, width)
+    # on a rectangle the x and y mirrors run over different lengths
+    if symmetry == 2:
+        return height - 1 - x, width - 1 - y
+    if symmetry == 4:
+        return x, width - 1 - y
+    if symmetry == 5:
+        return height - 1 - x, y
+    return x, y
+
+
+def untransform(move, symmetry, width, height):
+    return transform(move, INVERSE[symmetry], width, height)
+
+
+def symmetry_keys(cells, width, height):
+    # zobrist key of each orientation of a flat board (cell x * width + y), indexed
+    # by symmetry; orientations a rectangle doesn't have are None
+    zobrist, _ = zobrist_table(width, height)
+    keys = [None] * 8
+    for symmetry in symmetries(width, height):
+        keys[symmetry] = 0
+    for i, value in enumerate(cells):
+        if value:
+            x, y = divmod(i, width)
+            for symmetry in symmetries(width, height):
+                tx, ty = transform((x, y), symmetry, width, height)
+                keys[symmetry] ^= zobrist[tx][ty][value]
+    return keys
+
+
+def canonical(keys):
+    # (smallest key, the symmetry that produces it); the same for every orientation
+    # of a position. a move maps to the canonical board with transform(move, symmetry)
+    # and back with untransform
+    return min((key, symmetry) for symmetry, key in enumerate(keys) if key is not None)
@@ -0,0 +1,14 @@
+from analyze_games import analyze_record
+from benchmarks.positions import random_moves
+
+
+def record(seed):
+    moves = [[x, y, 1 + i % 2, 1.0, None] for i, (x, y) in enumerate(random_moves(15, 10, seed))]
+    return {"version": 1, "width": 15, "height": 15, "moves": moves}
+
+
+def test_analysis_does_not_depend_on_earlier_records():
+    # the worker's game is reused from record to record
+    first = analyze_record(record(2), 2, 10 ** 5)
+    analyze_record(record(3), 2, 10 ** 5)
+    assert analyze_record(record(2), 2, 10 ** 5) == first
@@ -0,0 +1,43 @@
+import random
+
+import pytest
+
+from gameplay import gamePlay
+
+
+@pytest.mark.parametrize("width,height", [(5, 5), (9, 7), (15, 15)])
+def test_makes_five_matches_list_scan(width, height):
+    # the bitboard's shift/AND test must agree with the list board's line walk
+    # for every empty cell and both players, including runs along the edges
+    for seed in range(20):
+        rng = random.Random(seed)
+        bits = gamePlay(width, height, backend="bitboard")
+        plain = gamePlay(width, height)
+        cells = [(x, y) for x in range(height) for y in range(width)]
+        rng.shuffle(cells)
+        for move in cells[:rng.randrange(len(cells) * 2 // 3)]:
+            player = rng.choice((1, 2))
+            bits.setCell(move[0], move[1], player)
+            plain.setCell(move[0], move[1], player)
+        for x in range(height):
+            for y in range(width):
+                if plain.board[x][y] == 0:
+                    for player in (1, 2):
+                        assert bits.is_winning_move((x, y), player) == \
+                            plain.is_winning_move((x, y), player), (seed, x, y, player)
+
+
+@pytest.mark.parametrize("size", [5, 9, 15, 19])
+def test_run_counts_score_like_the_list_scan(size):
+    # evaluate_full from shift-and-AND run counts against the list board's walk
+    for seed in range(20):
+        rng = random.Random(seed)
+        bits = gamePlay(size, size, backend="bitboard")
+        plain = gamePlay(size, size)
+        cells = [(x, y) for x in range(size) for y in range(size)]
+        rng.shuffle(cells)
+        for move in cells[:rng.randrange(len(cells) * 2 // 3)]:
+            player = rng.choice((1, 2))
+            bits.setCell(move[0], move[1], player)
+            plain.setCell(move[0], move[1], player)
+        assert bits.evaluate_full() == plain.evaluate_full(), seed
@@ -0,0 +1,26 @@
+import asyncio
+
+from engine_service import EngineService
+
+
+def test_non_positive_budgets_are_rejected():
+    # a zero budget would mean no deadline, and a search that holds a worker
+    # all the way to max_depth
+    async def run():
+        service = EngineService(workers=1)
+        try:
+            replies = [
+                await service.handle({"op": "new", "game": "g", "budget_ms": 0}),
+                await service.handle({"op": "new", "game": "g", "budget_ms": 200}),
+                await service.handle({"op": "move", "game": "g", "move": [7, 7], "budget_ms": -5}),
+                service.stats(),
+            ]
+        finally:
+            service.executor.shutdown()
+        return replies
+
+    bad_new, new, bad_move, stats = asyncio.run(run())
+    assert "error" in bad_new
+    assert new == {"ok": True}
+    assert "error" in bad_move
+    assert stats["running"] == 0 and stats["queued"] == 0
@@ -0,0 +1,38 @@
+import random
+
+import pytest
+
+from gameplay import gamePlay
+
+
+def random_cells(size, rng):
+    cells = [(x, y) for x in range(size) for y in range(size)]
+    rng.shuffle(cells)
+    return cells
+
+
+@pytest.mark.parametrize("backend", ["list", "bitboard"])
+@pytest.mark.parametrize("size", [5, 9, 15, 19])
+def test_incremental_evaluate_matches_full_scan(backend, size):
+    # the incrementally kept line scores must agree with a full board scan after
+    # every move and every undo, on random positions of every fill level
+    for seed in range(10):
+        rng = random.Random(seed)
+        game = gamePlay(size, size, backend=backend)
+        cells = random_cells(size, rng)
+        played = rng.randrange(1, len(cells) // 2)
+        for i, move in enumerate(cells[:played]):
+            game.push(move, game.AI if i % 2 == 0 else game.HUMAN)
+            assert game.evaluate() == game.evaluate_full(), (seed, i)
+        for i in range(played // 2):
+            game.pop()
+            assert game.evaluate() == game.evaluate_full(), (seed, "undo", i)
+
+
+def test_evaluate_matches_after_snapshot_reload():
+    rng = random.Random(1)
+    game = gamePlay(15, 15)
+    for i, move in enumerate(random_cells(15, rng)[:60]):
+        game.makeMove(move, game.AI if i % 2 == 0 else game.HUMAN)
+    copy = gamePlay.from_snapshot(game.snapshot())
+    assert copy.evaluate() == copy.evaluate_full() == game.evaluate()
@@ -0,0 +1,26 @@
+import game_record
+from gameplay import gamePlay
+
+
+def test_records_keep_what_chose_each_move(tmp_path):
+    path = str(tmp_path / "games.jsonl")
+    game = gamePlay(9, 9)
+    recorder = game_record.GameRecorder(9, 9, "ai_vs_ai", game_record.side("alphabeta", 2),
+                                        game_record.side("minimax", 2), path)
+    for _ in range(4):
+        score, move = game.search(max_depth=2)
+        recorder.add(move, game.curr_player, 1.0, score, game.search_source)
+        game.makeMove(move, game.curr_player)
+    recorder.finish(0, "abandoned")
+    record, = game_record.read_records(path)
+    assert record["version"] == game_record.VERSION
+    assert [row[5] for row in record["moves"]] == ["pvs"] * 4
+    assert len(list(game_record.positions(record))) == 4
+
+
+def test_positions_reads_records_without_sources():
+    record = {"version": 1, "width": 9, "height": 9,
+              "moves": [[4, 4, 1, 10.0, 0], [4, 5, 2, 800.0, None]]}
+    (_, move, player, ms, score), (state, *_) = game_record.positions(record)
+    assert (move, player, ms, score) == ((4, 4), 1, 10.0, 0)
+    assert state.get(4, 4) == 1
@@ -0,0 +1,36 @@
+import random
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from gameplay import gamePlay
+
+
+def test_evaluate_children_matches_playing_each_move():
+    rng = random.Random(5)
+    game = gamePlay(15, 15, evaluator="numpy")
+    cells = [(x, y) for x in range(15) for y in range(15)]
+    rng.shuffle(cells)
+    for i, move in enumerate(cells[:40]):
+        game.makeMove(move, game.AI if i % 2 == 0 else game.HUMAN)
+    moves = game.generateMoves()
+    for player in (game.AI, game.HUMAN):
+        scores = game.numpy_eval.evaluate_children(moves, player)
+        for move, score in zip(moves, scores):
+            game.push(move, player)
+            assert score == game.evaluate(), (move, player)
+            game.pop()
+
+
+def test_numpy_ordering_keeps_the_search_result():
+    rng = random.Random(9)
+    cells = [(x, y) for x in range(4, 11) for y in range(4, 11)]
+    rng.shuffle(cells)
+    results = []
+    for evaluator in ("incremental", "numpy"):
+        game = gamePlay(15, 15, evaluator=evaluator, tt_size=0)
+        for i, move in enumerate(cells[:10]):
+            game.makeMove(move, game.AI if i % 2 == 0 else game.HUMAN)
+        results.append(game.alphabeta(3, -float('inf'), float('inf'), True)[0])
+    assert results[0] == results[1]
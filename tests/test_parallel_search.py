@@ -0,0 +1,16 @@
+from benchmarks.positions import build_position, random_moves
+from parallel_search import ParallelSearch
+
+
+def test_parallel_matches_serial_across_searches():
+    # one pool for every search, so the workers' cached games carry over from
+    # one search to the next, deeper ones first; each result must still equal
+    # a fresh serial search
+    with ParallelSearch(2) as parallel:
+        for seed in (2, 3):
+            moves = random_moves(15, 12, seed)
+            for depth in (4, 3, 2):
+                serial = build_position(15, moves, tt_size=0)
+                expected = serial.alphabeta(depth, -float('inf'), float('inf'), True)
+                game = build_position(15, moves, tt_size=0)
+                assert parallel.search(game, depth) == expected, (seed, depth)
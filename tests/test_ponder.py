@@ -0,0 +1,47 @@
+from gameplay import gamePlay
+from ponder import Ponderer
+
+
+class Recorder(dict):
+    # keeps every answer stored, even ones later overwritten
+    def __init__(self):
+        super().__init__()
+        self.stored = []
+
+    def __setitem__(self, state, found):
+        self.stored.append(found)
+        super().__setitem__(state, found)
+
+
+class RecordingPonderer(Ponderer):
+    @property
+    def results(self):
+        return self._results
+
+    @results.setter
+    def results(self, value):
+        self._results = Recorder()
+
+
+def test_restarted_ponder_only_caches_searched_answers():
+    # stop() once pondering has finished cancels an idle copy; the next start()
+    # must clear that, or the first reply's answer is the unsearched fallback
+    # cached as a full-depth result
+    game = gamePlay(15, 15)
+    for i, move in enumerate([(7, 7), (7, 8), (8, 8), (6, 6)]):
+        game.makeMove(move, game.AI if i % 2 == 0 else game.HUMAN)
+    ponderer = RecordingPonderer(game, replies=2, depth=2, extra_depth=0)
+    ponderer.start()
+    ponderer.thread.join()
+    ponderer.stop()
+    ponderer.start()
+    ponderer.thread.join()
+    assert len(ponderer.results.stored) == 4
+    for reached, score, move in ponderer.results.stored:
+        assert reached == 2 and score is not None and move is not None
+
+    reply = ponderer.ponder_game.generateMoves()[0]
+    game.makeMove(reply, game.HUMAN)
+    fresh = gamePlay.from_snapshot(game.snapshot(), tt_size=0)
+    expected = fresh.search(max_depth=2)
+    assert ponderer.take(game.snapshot(), 2) == expected
@@ -0,0 +1,33 @@
+from gameplay import gamePlay
+
+
+def opened():
+    game = gamePlay(15, 15)
+    for i, move in enumerate([(7, 7), (7, 8), (8, 8), (6, 6)]):
+        game.makeMove(move, game.AI if i % 2 == 0 else game.HUMAN)
+    return game
+
+
+def test_cancel_while_idle_does_not_abort_the_next_search():
+    game = opened()
+    expected = game.search(max_depth=2)
+    game.cancel()
+    assert game.search(max_depth=2) == expected
+    assert game.depth_reached == 2 and game.search_source == "pvs"
+    for run in (lambda: game.alphabeta(2, -float('inf'), float('inf'), True),
+                lambda: game.pvs(2, -float('inf'), float('inf'), True),
+                lambda: game.minimax(1, True)):
+        fresh = run()
+        game.cancel()
+        assert run() == fresh
+
+
+def test_search_stops_deepening_once_it_finds_a_win():
+    game = gamePlay(15, 15)
+    game.threat_budget = 0
+    for y in range(4):
+        game.makeMove((7, y), game.AI)
+        game.makeMove((9, y), game.HUMAN)
+    score, move = game.search(max_depth=4)
+    assert score >= 10 ** 7 and move == (7, 4)
+    assert game.depth_reached == 1
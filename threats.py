@@ -0,0 +1,121 @@
+class ThreatSearch:
+    # threat-space search for forced wins. the attacker only plays fours (and,
+    # with threes=True, open threes) and the defender only answers them, so the
+    # tree stays tiny even many plies deep:
+    #  - VCF (victory by continuous fours): every attacking move makes a four,
+    #    the defender's only reply is the cell that completes it
+    #  - VCT (threes=True): open threes are allowed too; the defender then tries
+    #    every cell that stops the three turning into a four, plus its own fours
+    # returns the winning line starting with the attacker's move, or None when no
+    # win was found within max_depth attacking moves and node_budget nodes
+    def __init__(self, game, node_budget=2000, threes=False):
+        self.game = game
+        self.node_budget = node_budget
+        self.threes = threes
+        self.nodes = 0
+        self.exhausted = False
+        self.failed = set()
+
+    def find(self, attacker, max_depth=12):
+        self.nodes = 0
+        self.exhausted = False
+        self.failed = set()
+        return self._attack(attacker, max_depth)
+
+    def _threat_moves(self, player, min_stones):
+        # cells whose window already holds `min_stones` of the player's stones in
+        # some direction, best candidate score first
+        game = self.game
+        keys = game.window_keys
+        counts = game.patterns.stone_counts[player]
+        width = game.width
+        cells = []
+        for x, y in game.frontier:
+            i = 4 * (x * width + y)
+            if max(counts[keys[i]], counts[keys[i + 1]], counts[keys[i + 2]], counts[keys[i + 3]]) >= min_stones:
+                cells.append((x, y))
+        scores = game.score_candidates(cells)
+        return [cell for _, cell in sorted(zip(scores, cells), reverse=True)]
+
+    def _makes_four(self, move, player):
+        game = self.game
+        game.push(move, player)
+        four = bool(game.winning_cells(player))
+        game.pop()
+        return four
+
+    def _open_four_cells(self, player):
+        # cells where the player would get two ways to make five at once
+        game = self.game
+        cells = []
+        for move in self._threat_moves(player, 3):
+            game.push(move, player)
+            if len(game.winning_cells(player)) >= 2:
+                cells.append(move)
+            game.pop()
+        return cells
+
+    def _attack(self, attacker, depth):
+        game = self.game
+        wins = game.winning_cells(attacker)
+        if wins:
+            return [wins[0]]
+        if depth == 0 or self.exhausted:
+            return None
+        self.nodes += 1
+        if self.nodes > self.node_budget:
+            self.exhausted = True
+            return None
+        if game.hash in self.failed:
+            return None
+        defender = 3 - attacker
+        defender_wins = game.winning_cells(defender)
+        if defender_wins:
+            # the attacker has to block, which only keeps the initiative if the
+            # block is itself a four
+            if len(defender_wins) > 1 or not self._makes_four(defender_wins[0], attacker):
+                self.failed.add(game.hash)
+                return None
+            moves = defender_wins
+        else:
+            moves = self._threat_moves(attacker, 2 if self.threes else 3)
+        for move in moves:
+            game.push(move, attacker)
+            line = self._defend(attacker, depth)
+            game.pop()
+            if line is not None:
+                return [move] + line
+            if self.exhausted:
+                return None
+        self.failed.add(game.hash)
+        return None
+
+    def _defend(self, attacker, depth):
+        game = self.game
+        defender = 3 - attacker
+        threats = game.winning_cells(attacker)
+        if len(threats) >= 2:
+            # the defender has no four of its own here, so one block is not enough
+            return [threats[0]]
+        if len(threats) == 1:
+            replies = threats
+        elif self.threes and (open_fours := self._open_four_cells(attacker)):
+            replies = set(self._threat_moves(attacker, 3))
+            replies.update(open_fours)
+            replies.update(move for move in self._threat_moves(defender, 3)
+                           if self._makes_four(move, defender))
+            replies = sorted(replies)
+        else:
+            return None
+        principal = None
+        for reply in replies:
+            if game.is_winning_move(reply, defender):
+                return None
+            game.push(reply, defender)
+            line = self._attack(attacker, depth - 1)
+            game.pop()
+            if line is None:
+                return None
+            if principal is None:
+                principal = [reply] + line
+        return principal
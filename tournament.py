@@ -0,0 +1,142 @@
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from gameplay import gamePlay
+
+
+def parse_engine(text):
+    algo, _, depth = text.partition(":")
+    if algo not in ("alphabeta", "pvs", "minimax"):
+        raise argparse.ArgumentTypeError(f"Unknown algorithm: {algo}")
+    return {"algo": algo, "depth": int(depth or 2)}
+
+
+def random_opening(size, plies, seed):
+    # stones placed at random around the centre, alternating AI and HUMAN
+    rng = random.Random(seed)
+    low, high = max(0, size // 2 - 2), min(size - 1, size // 2 + 2)
+    cells = [(x, y) for x in range(low, high + 1) for y in range(low, high + 1)]
+    rng.shuffle(cells)
+    return cells[:plies]
+
+
+def engine_move(game, engine, player):
+    # player 1 maximizes the evaluation and player 2 minimizes it
+    maximizing = player == game.AI
+    if engine["algo"] == "alphabeta":
+        return game.alphabeta(engine["depth"], -float('inf'), float('inf'), maximizing)
+    if engine["algo"] == "pvs":
+        return game.pvs(engine["depth"], -float('inf'), float('inf'), maximizing)
+    return game.minimax(engine["depth"], maximizing)
+
+
+def play_game(spec):
+    size = spec["size"]
+    # each side searches its own copy of the game, so one engine's transposition
+    # table, killers and history never help or hinder the other; both copies
+    # play every move
+    games = {1: gamePlay(size, size), 2: gamePlay(size, size)}
+    game = games[1]
+    engines = {game.AI: spec["black"], game.HUMAN: spec["white"]}
+    player = game.AI
+    for move in spec["opening"]:
+        for side in games.values():
+            side.makeMove(tuple(move), player)
+        player = 3 - player
+    moves, times, nodes, evals = [], [], [], []
+    while game.checkWinner() == 0 and game.stone_count < size * size:
+        engine_game = games[player]
+        engine_game.nodes = 0
+        start = time.perf_counter()
+        score, move = engine_move(engine_game, engines[player], player)
+        times.append(round((time.perf_counter() - start) * 1000, 3))
+        if move is None:
+            break
+        for side in games.values():
+            side.makeMove(move, player)
+        moves.append(list(move))
+        nodes.append(engine_game.nodes)
+        evals.append(score)
+        player = 3 - player
+    winner = game.checkWinner()
+    winner_engine = None
+    if winner:
+        winner_engine = "black" if winner == game.AI else "white"
+    return {
+        "game": spec["game"],
+        "size": size,
+        "black": spec["black"],
+        "white": spec["white"],
+        "opening": spec["opening"],
+        "winner": winner,
+        "winner_engine": spec[winner_engine] if winner_engine else None,
+        "moves": moves,
+        "move_times_ms": times,
+        "nodes": nodes,
+        "evals": evals,
+    }
+
+
+def build_specs(engines, sizes, games, opening_plies, seed):
+    specs = []
+    for size, (first, second) in itertools.product(sizes, itertools.combinations(engines, 2)):
+        for i in range(games):
+            # alternate colours so neither engine always moves first
+            black, white = (first, second) if i % 2 == 0 else (second, first)
+            specs.append({
+                "game": len(specs),
+                "size": size,
+                "black": black,
+                "white": white,
+                "opening": random_opening(size, opening_plies, seed + len(specs)),
+            })
+    return specs
+
+
+def engine_name(engine):
+    return f"{engine['algo']}:{engine['depth']}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless engine-vs-engine tournament")
+    parser.add_argument("--engines", type=parse_engine, nargs="+",
+                        default=[parse_engine("alphabeta:2"), parse_engine("minimax:2")],
+                        help="engines as algo:depth, every pair plays each other")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[15])
+    parser.add_argument("--games", type=int, default=2, help="games per pairing and board size")
+    parser.add_argument("--opening-plies", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--output", default="-", help="JSONL file, - for stdout")
+    args = parser.parse_args(argv)
+
+    specs = build_specs(args.engines, args.sizes, args.games, args.opening_plies, args.seed)
+    out = sys.stdout if args.output == "-" else open(args.output, "w")
+    score = {engine_name(engine): 0 for engine in args.engines}
+    draws = 0
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            futures = [executor.submit(play_game, spec) for spec in specs]
+            for future in as_completed(futures):
+                result = future.result()
+                out.write(json.dumps(result) + "\n")
+                out.flush()
+                if result["winner_engine"]:
+                    score[engine_name(result["winner_engine"])] += 1
+                else:
+                    draws += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    summary = ", ".join(f"{name}: {wins}" for name, wins in score.items())
+    print(f"{len(specs)} games - {summary}, draws: {draws}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+
+class TranspositionTable:
+    # fixed number of slots indexed by key % size; entries are (key, depth, flag, score, move).
+    # replacement "depth" keeps the deeper of two colliding entries, "always" keeps the newest.
+    def __init__(self, size=1 << 16, replacement="depth"):
+        if replacement not in ("depth", "always"):
+            raise ValueError(f"Unknown replacement policy: {replacement}")
+        self.size = size
+        self.replacement = replacement
+        self.slots = [None] * size
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+        self.stores = 0
+
+    def probe(self, key):
+        entry = self.slots[key % self.size]
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry[0] != key:
+            self.collisions += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def store(self, key, depth, flag, score, move):
+        index = key % self.size
+        entry = self.slots[index]
+        if (entry is not None and entry[0] != key and
+                self.replacement == "depth" and entry[1] > depth):
+            return
+        self.slots[index] = (key, depth, flag, score, move)
+        self.stores += 1
+
+    def clear(self):
+        self.slots = [None] * self.size
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+        self.stores = 0
+
+    def stats(self):
+        probes = self.hits + self.misses + self.collisions
+        return {
+            "size": self.size,
+            "used": sum(1 for entry in self.slots if entry is not None),
+            "hits": self.hits,
+            "misses": self.misses,
+            "collisions": self.collisions,
+            "stores": self.stores,
+            "hit_rate": self.hits / probes if probes else 0.0,
+        }